@@ -1,15 +1,19 @@
-from typing import Generator, Optional
+import random
+from typing import AsyncGenerator, Generator, List, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt
 from pydantic import ValidationError
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.profiling import profile
 from app.core.security import verify_token
 from app.db.session import SessionLocal
 from app.models.user import User
+from app.services.author_loader import AuthorLoader
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
@@ -53,4 +57,51 @@ def get_current_active_superuser(
         raise HTTPException(
             status_code=400, detail="The user doesn't have enough privileges"
         )
-    return current_user 
\ No newline at end of file
+    return current_user
+
+def get_batch_ids(
+    ids: str = Query(..., description="Comma-separated ids, e.g. ids=3,1,2")
+) -> List[int]:
+    """Ids of a batch read, in request order; duplicates are kept"""
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    if not parsed:
+        raise HTTPException(status_code=422, detail="ids must not be empty")
+    if len(parsed) > settings.BATCH_MAX_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {settings.BATCH_MAX_IDS} ids per request")
+    return parsed
+
+def get_author_loader(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+) -> AuthorLoader:
+    """Author summaries for this request's responses; the viewer's own is known up front"""
+    loader = AuthorLoader(db)
+    loader.prime(current_user)
+    return loader
+
+async def profile_request(
+    request: Request,
+    db: Session = Depends(get_db)
+) -> AsyncGenerator:
+    """
+    Profile the request when a superuser asks for it (X-Profile header or
+    ?profile=1) or when it is picked by PROFILE_SAMPLE_RATE. Profiles are
+    listed and downloaded through /admin/profiles.
+    """
+    if request.headers.get("X-Profile") or request.query_params.get("profile"):
+        token = await reusable_oauth2(request)
+        user = await run_in_threadpool(get_current_user, db, token)
+        get_current_active_superuser(user)
+        reason = f"requested by user {user.id}"
+    elif random.random() < settings.PROFILE_SAMPLE_RATE:
+        reason = "sampled"
+    else:
+        yield
+        return
+
+    route = request.scope.get("route")
+    with profile(request.method, getattr(route, "path", request.url.path), reason):
+        yield
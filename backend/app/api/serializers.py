@@ -0,0 +1,152 @@
+import hashlib
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Type, get_args
+import orjson
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+from sqlalchemy.sql import ColumnElement
+from app.services.author_loader import AuthorLoader
+
+def _embedded(annotation: Any) -> bool:
+    return any(isinstance(arg, type) and issubclass(arg, BaseModel) for arg in (annotation, *get_args(annotation)))
+
+@lru_cache(maxsize=None)
+def column_fields(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    """
+    Fields of ``schema`` read from columns; embedded models (author
+    summaries) are filled in afterwards by their loaders.
+    """
+    return tuple(name for name, field in schema.model_fields.items() if not _embedded(field.annotation))
+
+def projection(schema: Type[BaseModel], model: Any, **expressions: ColumnElement) -> List[ColumnElement]:
+    """
+    Columns selecting exactly the fields of ``schema``, in field order.
+    Fields are read from the model's column of the same name unless an
+    expression is given for them (computed counts, renamed columns).
+    """
+    return [
+        (expressions[name] if name in expressions else getattr(model, name)).label(name)
+        for name in column_fields(schema)
+    ]
+
+@lru_cache(maxsize=None)
+def row_serializer(schema: Type[BaseModel]) -> Callable[[Tuple], Dict[str, Any]]:
+    """
+    Build (once per schema) a function turning a projection row into a
+    response dict, without ORM hydration or Pydantic validation.
+    """
+    fields = column_fields(schema)
+
+    def serialize(row: Tuple) -> Dict[str, Any]:
+        return dict(zip(fields, row))
+
+    return serialize
+
+def list_response(
+    schema: Type[BaseModel],
+    rows: Iterable[Tuple],
+    authors: Optional[AuthorLoader] = None
+) -> ORJSONResponse:
+    """Render projection rows for ``schema`` with orjson, with author summaries if given a loader"""
+    serialize = row_serializer(schema)
+    items = [serialize(row) for row in rows]
+    if authors is not None:
+        authors.attach(items)
+    return ORJSONResponse(items)
+
+def batch_response(
+    schema: Type[BaseModel],
+    ids: Sequence[int],
+    rows: Iterable[Tuple],
+    hidden: Callable[[Any], bool] = lambda row: False,
+    authors: Optional[AuthorLoader] = None
+) -> ORJSONResponse:
+    """
+    Render rows fetched by id in the order the ids were requested. Every id
+    gets an entry in ``items``; ids without a row, or whose row the viewer
+    may not see, get null there and an entry in ``missing`` saying why.
+    """
+    serialize = row_serializer(schema)
+    found = {row.id: row for row in rows}
+    items, missing = [], []
+    for item_id in ids:
+        row = found.get(item_id)
+        if row is None:
+            reason = "not_found"
+        elif hidden(row):
+            reason = "hidden"
+        else:
+            items.append(serialize(row))
+            continue
+        items.append(None)
+        missing.append({"id": item_id, "reason": reason})
+    if authors is not None:
+        authors.attach([item for item in items if item is not None])
+    return ORJSONResponse({"items": items, "missing": missing})
+
+# Responses depend on the viewer, so shared caches must not store them and
+# clients must revalidate before reuse.
+CACHE_CONTROL = "private, no-cache"
+
+def etag_for(rows: Iterable[Any], version_fields: Sequence[str], embedded: Any = None) -> str:
+    """
+    Strong ETag over the version fields of one or more projection rows,
+    and over ``embedded`` data (author summaries) the response includes
+    """
+    versions = [[getattr(row, field) for field in version_fields] for row in rows]
+    if embedded is not None:
+        versions.append(embedded)
+    digest = hashlib.blake2b(orjson.dumps(versions, default=str), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in header.split(","))
+
+def conditional_response(request: Request, etag: str, render: Callable[[], Any]) -> Response:
+    """
+    Answer 304 when the client already holds ``etag``; only otherwise call
+    ``render`` to build the body.
+    """
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return ORJSONResponse(render(), headers=headers)
+
+def render_json(content: Any) -> bytes:
+    """The body ORJSONResponse would send for ``content``"""
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+class SharedBody(NamedTuple):
+    """
+    Result of a single-flight read: the rows for the per-viewer checks
+    (visibility) each caller still makes, and the serialized body and ETag,
+    built once by the leader and sent as they are by every caller
+    """
+    rows: List[Any]
+    body: bytes
+    etag: Optional[str] = None
+
+def shared_item(
+    schema: Type[BaseModel],
+    row: Optional[Tuple],
+    version_fields: Sequence[str],
+    authors: AuthorLoader
+) -> Optional[SharedBody]:
+    """Render one projection row with its author summary and ETag, for all readers of a flight"""
+    if row is None:
+        return None
+    item = authors.attach([row_serializer(schema)(row)])[0]
+    return SharedBody([row], render_json(item), etag_for([row], version_fields, [item["author"]]))
+
+def shared_response(request: Request, shared: SharedBody) -> Response:
+    """Send a shared body, answering 304 when the client already holds its ETag"""
+    headers = {"ETag": shared.etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+    if etag_matches(request, shared.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(shared.body, media_type="application/json", headers=headers)
@@ -1,9 +1,12 @@
 from fastapi import APIRouter
-from .endpoints import posts, auth, users, comments
+from .endpoints import posts, auth, users, comments, admin, notifications, tags
 
 api_router = APIRouter()
 
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(posts.router, prefix="/posts", tags=["posts"])
-api_router.include_router(comments.router, prefix="/comments", tags=["comments"]) 
\ No newline at end of file
+api_router.include_router(comments.router, prefix="/comments", tags=["comments"])
+api_router.include_router(tags.router, prefix="/tags", tags=["tags"])
+api_router.include_router(notifications.router, prefix="/notifications", tags=["notifications"])
+api_router.include_router(admin.router, prefix="/admin", tags=["admin"])
\ No newline at end of file
@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, BackgroundTasks
+import asyncio
+import os
+from dataclasses import asdict
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from sqlalchemy import func, cast, Date
 from typing import List
 from datetime import datetime, timedelta
 from app.api import deps
-from app.models.notification import Notification, NotificationType, ContentType, SeverityLevel
-from app.schemas.notification import NotificationCreate, NotificationResponse
-from app.core.security import get_current_admin_user
-from app.websocket import notify_content_moderated
-from app.core.email import send_moderation_alert
+from app.models.notification import Notification
+from app.models.user import User
+from app.schemas.notification import NotificationResponse
+from app.services.remoderation import remoderation_job
+from app.services.notification_partitions import retained_since
+from app.services.moderation_policy import current_policy, rederive_verdicts
+from app.core.config import settings
+from app.core.single_flight import single_flight_stats
+from app.core.profiling import profile_store
 
 router = APIRouter()
 
@@ -17,7 +25,7 @@ async def get_notifications(
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(deps.get_current_active_superuser)
 ):
     """Get all admin notifications with pagination"""
     notifications = (
@@ -32,17 +40,21 @@ async def get_notifications(
 @router.get("/notifications/unread-count", response_model=dict)
 async def get_unread_count(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(deps.get_current_active_superuser)
 ):
     """Get count of unread notifications"""
-    count = db.query(Notification).filter(Notification.is_read == False).count()
+    count = (
+        db.query(Notification)
+        .filter(Notification.created_at >= retained_since(), Notification.is_read == False)
+        .count()
+    )
     return {"count": count}
 
 @router.put("/notifications/{notification_id}/read")
 async def mark_as_read(
     notification_id: int,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(deps.get_current_active_superuser)
 ):
     """Mark a notification as read"""
     notification = db.query(Notification).filter(Notification.id == notification_id).first()
@@ -56,21 +68,25 @@ async def mark_as_read(
 @router.put("/notifications/read-all")
 async def mark_all_as_read(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(deps.get_current_active_superuser)
 ):
     """Mark all notifications as read"""
-    db.query(Notification).filter(Notification.is_read == False).update({"is_read": True})
+    db.query(Notification).filter(
+        Notification.created_at >= retained_since(), Notification.is_read == False
+    ).update({"is_read": True})
     db.commit()
     return {"status": "success"}
 
 @router.get("/stats")
 async def get_moderation_stats(
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: User = Depends(deps.get_current_active_superuser)
 ):
     """Get moderation statistics for the analytics dashboard"""
+    since = retained_since()
+
     # Get total violations
-    total_violations = db.query(Notification).count()
+    total_violations = db.query(Notification).filter(Notification.created_at >= since).count()
 
     # Get violations by severity
     severity_counts = (
@@ -78,6 +94,7 @@ async def get_moderation_stats(
             Notification.severity,
             func.count(Notification.id).label('count')
         )
+        .filter(Notification.created_at >= since)
         .group_by(Notification.severity)
         .all()
     )
@@ -95,6 +112,7 @@ async def get_moderation_stats(
             Notification.content_type,
             func.count(Notification.id).label('count')
         )
+        .filter(Notification.created_at >= since)
         .group_by(Notification.content_type)
         .all()
     )
@@ -128,46 +146,75 @@ async def get_moderation_stats(
         ]
     }
 
-async def create_moderation_notification(
-    db: Session,
-    content_type: ContentType,
-    content_id: int,
-    severity: SeverityLevel,
-    content: str,
-    background_tasks: BackgroundTasks
+@router.post("/remoderation", status_code=202)
+async def start_remoderation(
+    restart: bool = False,
+    current_user: User = Depends(deps.get_current_active_superuser)
 ):
-    """Create a new moderation notification with email alert for high severity"""
-    notification = Notification(
-        type=NotificationType.moderation,
-        severity=severity,
-        content=content,
-        content_id=content_id,
-        content_type=content_type
-    )
-    db.add(notification)
+    """Reclassify all posts and comments; continues a paused or failed run unless restart is set"""
+    state = await remoderation_job.start(restart)
+    if state is None:
+        raise HTTPException(status_code=409, detail="Re-moderation is already running")
+    return state
+
+@router.get("/remoderation")
+async def get_remoderation_status(
+    current_user: User = Depends(deps.get_current_active_superuser)
+):
+    """Progress and throughput of the re-moderation job"""
+    state = await asyncio.to_thread(remoderation_job.status)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Re-moderation has never run")
+    return state
+
+@router.post("/remoderation/pause")
+async def pause_remoderation(
+    current_user: User = Depends(deps.get_current_active_superuser)
+):
+    """Pause the re-moderation job; starting it again continues from its last checkpoint"""
+    state = await remoderation_job.pause()
+    if state is None:
+        raise HTTPException(status_code=404, detail="Re-moderation has never run")
+    return state
+
+@router.get("/moderation/policy")
+async def get_moderation_policy(
+    current_user: User = Depends(deps.get_current_active_superuser)
+):
+    """Thresholds currently applied to classifier scores"""
+    return asdict(current_policy())
+
+@router.post("/moderation/rederive")
+def rederive_moderation(
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_active_superuser)
+):
+    """Re-apply the current policy to stored scores without calling the model"""
+    counts = rederive_verdicts(db)
     db.commit()
-    db.refresh(notification)
-    
-    # Send WebSocket notification
-    await notify_content_moderated({
-        "id": notification.id,
-        "type": notification.type,
-        "severity": notification.severity,
-        "content": notification.content,
-        "contentId": notification.content_id,
-        "contentType": notification.content_type,
-        "createdAt": notification.created_at.isoformat(),
-        "isRead": notification.is_read
-    })
-
-    # Send email for high severity violations
-    if severity == SeverityLevel.high:
-        admin_emails = ["admin@example.com"]  # Replace with actual admin emails
-        background_tasks.add_task(
-            send_moderation_alert,
-            admin_emails=admin_emails,
-            content_type=content_type,
-            content_id=content_id,
-            severity=severity,
-            reason=content
-        ) 
\ No newline at end of file
+    return {"policy_version": settings.MODERATION_POLICY_VERSION, "updated": counts}
+
+@router.get("/metrics/single-flight")
+async def get_single_flight_metrics(
+    current_user: User = Depends(deps.get_current_active_superuser)
+):
+    """Per-endpoint share of reads served by joining an in-flight query (this process)"""
+    return single_flight_stats()
+
+@router.get("/profiles")
+async def list_profiles(
+    current_user: User = Depends(deps.get_current_active_superuser)
+):
+    """Stored request profiles, newest first"""
+    return await asyncio.to_thread(profile_store.list)
+
+@router.get("/profiles/{profile_id}")
+async def download_profile(
+    profile_id: str,
+    current_user: User = Depends(deps.get_current_active_superuser)
+):
+    """Collapsed stacks of one profile, ready for flamegraph.pl or speedscope"""
+    path = profile_store.path(profile_id)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"{profile_id}.collapsed")
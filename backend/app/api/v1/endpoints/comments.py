@@ -1,33 +1,89 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+import heapq
+from itertools import islice
+from typing import Any, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased
 
 from app.api import deps
+from app.core.idempotency import idempotent
+from app.core.rate_limit import rate_limited
+from app.core.single_flight import single_flight
+from app.api.serializers import (
+    projection, list_response, row_serializer, SharedBody, render_json, shared_item, shared_response
+)
 from app.models import User, Comment, Post, Like
-from app.models.notification import SeverityLevel as ContentSeverity
-from app.schemas.comment import CommentCreate, CommentResponse, CommentUpdate
-from app.services.ai_moderation import ai_moderator
+from app.models.notification import ContentType, ActivityType
+from app.schemas.comment import CommentCreate, CommentResponse, CommentUpdate, CommentSearchResponse
+from app.services.author_loader import AuthorLoader
+from app.services.post_deletion import not_deleted
+from app.services.ai_moderation import ai_moderator, moderation_columns
+from app.services.near_duplicates import near_duplicates
+from app.services.search import search_service
+from app.services import trending
+from app.core.config import settings
+from app.services.notification_outbox import create_moderation_notification
+from app.services.activity_notifications import record_activity, retract_activity, push_activity
 from app.db.session import get_db
+from app.websocket import notify_post_updated
 
 router = APIRouter()
 
+comment_reads = single_flight("get_comment")
+first_page_reads = single_flight("get_comments_first_page")
+
+Reply = aliased(Comment)
+
+# Response columns for list endpoints, with counts computed in the same query
+COMMENT_COLUMNS = projection(
+    CommentResponse,
+    Comment,
+    like_count=select(func.count(Like.id)).where(Like.comment_id == Comment.id).scalar_subquery(),
+    reply_count=select(func.count(Reply.id)).where(Reply.parent_id == Comment.id).scalar_subquery()
+)
+# Fields that change whenever a comment's response changes; content edits bump updated_at
+COMMENT_VERSION = (
+    "id", "updated_at", "is_moderated", "is_negative", "moderation_severity",
+    "is_hidden", "like_count", "reply_count"
+)
+
 @router.post("/{post_id}", response_model=CommentResponse)
+@idempotent
+@rate_limited("content")
 async def create_comment(
     post_id: int,
     comment: CommentCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
 ) -> Any:
     """
     Create new comment with AI content moderation
     """
     # Check if post exists
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post).filter(Post.id == post_id, not_deleted(Post)).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
+    # Checked before moderation, so a bad parent costs no inference request
+    parent = None
+    if comment.parent_id is not None:
+        parent = db.query(Comment).filter(Comment.id == comment.parent_id).first()
+        if not parent or parent.post_id != post_id:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
+
+    # Copies of recently hidden content reuse its verdict; one user's burst
+    # of copies is refused
+    duplicate = near_duplicates.check(comment.content, current_user.id)
+    if duplicate.user_copies >= settings.NEAR_DUPLICATE_USER_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many similar comments, please try again later"
+        )
+
     # Analyze content using AI moderation
-    moderation_result = await ai_moderator.analyze_content(comment.content)
+    moderation_result = duplicate.verdict or await ai_moderator.analyze_content(comment.content)
 
     # Create comment with moderation results
     db_comment = Comment(
@@ -35,18 +91,50 @@ async def create_comment(
         user_id=current_user.id,
         post_id=post_id,
         parent_id=comment.parent_id,
-        is_moderated=True,
-        is_negative=moderation_result["is_negative"],
-        moderation_severity=moderation_result["severity"],
-        moderation_reason=moderation_result["reason"],
-        is_hidden=moderation_result["severity"] in [ContentSeverity.MEDIUM, ContentSeverity.HIGH]
+        **moderation_columns(moderation_result)
     )
 
     db.add(db_comment)
+
+    # Notify the author of the comment or post being replied to; hidden
+    # comments neither notify nor count as engagement, like hidden mentions
+    activity = None
+    if not db_comment.is_hidden and parent is not None:
+        activity = record_activity(
+            db, parent.user_id, current_user, ActivityType.reply, ContentType.comment, parent.id
+        )
+        trending.bump(db, post_id, settings.TRENDING_REPLY_WEIGHT)
+    elif not db_comment.is_hidden:
+        activity = record_activity(
+            db, post.user_id, current_user, ActivityType.reply, ContentType.post, post_id
+        )
+        trending.bump(db, post_id, settings.TRENDING_COMMENT_WEIGHT)
+
+    # Queue an admin notification for flagged content, committed with the
+    # comment; copies were reported with the original
+    if moderation_result["is_negative"] and duplicate.verdict is None:
+        db.flush()
+        create_moderation_notification(
+            db,
+            ContentType.comment,
+            db_comment.id,
+            moderation_result["severity"],
+            moderation_result["reason"]
+        )
+
     db.commit()
     db.refresh(db_comment)
+    await push_activity(activity)
+    if not db_comment.is_hidden:
+        like_count, comment_count = db.execute(select(
+            select(func.count(Like.id)).where(Like.post_id == post_id).scalar_subquery(),
+            select(func.count(Comment.id)).where(Comment.post_id == post_id).scalar_subquery()
+        )).one()
+        await notify_post_updated({"id": post_id, "like_count": like_count, "comment_count": comment_count})
+
+    near_duplicates.add(duplicate.signature, current_user.id, moderation_result)
 
-    return db_comment
+    return authors.response(CommentResponse, db_comment)
 
 @router.get("/post/{post_id}", response_model=List[CommentResponse])
 def get_comments(
@@ -54,50 +142,113 @@ def get_comments(
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
 ) -> Any:
     """
     Get all comments for a post
     """
-    comments = db.query(Comment).filter(
-        Comment.post_id == post_id,
-        (Comment.is_hidden == False) | (Comment.user_id == current_user.id)
-    ).offset(skip).limit(limit).all()
-    
-    return comments
+    visible = (Comment.is_hidden == False) | (Comment.user_id == current_user.id)
+    live = not_deleted(Comment)
+    if skip > 0:
+        rows = db.execute(
+            select(*COMMENT_COLUMNS)
+            .where(Comment.post_id == post_id, visible, live)
+            .order_by(Comment.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        return list_response(CommentResponse, rows, authors)
+
+    # The first page is what everyone opening a post loads: the public part
+    # is queried and rendered once for concurrent readers, and the viewer's
+    # own hidden comments (usually none) are merged in
+    def public_page() -> SharedBody:
+        rows = db.execute(
+            select(*COMMENT_COLUMNS)
+            .where(Comment.post_id == post_id, Comment.is_hidden == False, live)
+            .order_by(Comment.id)
+            .limit(limit)
+        ).all()
+        serialize = row_serializer(CommentResponse)
+        return SharedBody(rows, render_json(authors.attach([serialize(row) for row in rows])))
+
+    public = first_page_reads.do((post_id, limit), public_page)
+    own_hidden = db.execute(
+        select(*COMMENT_COLUMNS)
+        .where(Comment.post_id == post_id, Comment.is_hidden == True, Comment.user_id == current_user.id, live)
+        .order_by(Comment.id)
+        .limit(limit)
+    ).all()
+    if not own_hidden:
+        return Response(public.body, media_type="application/json")
+    rows = heapq.merge(public.rows, own_hidden, key=lambda row: row.id)
+    return list_response(CommentResponse, islice(rows, limit), authors)
+
+@router.get("/search", response_model=CommentSearchResponse)
+@rate_limited("search")
+def search_comments(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+) -> Any:
+    """
+    Full-text search over comments, best matches first
+    """
+    rows, next_cursor = search_service.search(
+        db, Comment, COMMENT_COLUMNS, q, current_user.id, limit, cursor
+    )
+    serialize = row_serializer(CommentResponse)
+    return ORJSONResponse({
+        "items": authors.attach([serialize(row) for row in rows]),
+        "next_cursor": next_cursor
+    })
 
 @router.get("/{comment_id}", response_model=CommentResponse)
 def get_comment(
     comment_id: int,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
 ) -> Any:
     """
     Get a specific comment
     """
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
-    if not comment:
+    shared = comment_reads.do(comment_id, lambda: shared_item(
+        CommentResponse,
+        db.execute(select(*COMMENT_COLUMNS).where(Comment.id == comment_id, not_deleted(Comment))).first(),
+        COMMENT_VERSION,
+        authors
+    ))
+    if not shared:
         raise HTTPException(status_code=404, detail="Comment not found")
 
+    comment = shared.rows[0]
     if comment.is_hidden and comment.user_id != current_user.id:
         raise HTTPException(
             status_code=403,
             detail="Comment is hidden due to content violation"
         )
 
-    return comment
+    return shared_response(request, shared)
 
 @router.put("/{comment_id}", response_model=CommentResponse)
+@rate_limited("content")
 async def update_comment(
     comment_id: int,
     comment_update: CommentUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
 ) -> Any:
     """
     Update a comment with new AI content moderation
     """
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    db_comment = db.query(Comment).filter(Comment.id == comment_id, not_deleted(Comment)).first()
     if not db_comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
@@ -112,16 +263,23 @@ async def update_comment(
 
     # Update comment with new content and moderation results
     db_comment.content = comment_update.content
-    db_comment.is_moderated = True
-    db_comment.is_negative = moderation_result["is_negative"]
-    db_comment.moderation_severity = moderation_result["severity"]
-    db_comment.moderation_reason = moderation_result["reason"]
-    db_comment.is_hidden = moderation_result["severity"] in [ContentSeverity.MEDIUM, ContentSeverity.HIGH]
+    for key, value in moderation_columns(moderation_result).items():
+        setattr(db_comment, key, value)
+
+    # Queue an admin notification for flagged content, committed with the edit
+    if moderation_result["is_negative"]:
+        create_moderation_notification(
+            db,
+            ContentType.comment,
+            db_comment.id,
+            moderation_result["severity"],
+            moderation_result["reason"]
+        )
 
     db.commit()
     db.refresh(db_comment)
 
-    return db_comment
+    return authors.response(CommentResponse, db_comment)
 
 @router.delete("/{comment_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_comment(
@@ -132,7 +290,7 @@ def delete_comment(
     """
     Delete a comment
     """
-    db_comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    db_comment = db.query(Comment).filter(Comment.id == comment_id, not_deleted(Comment)).first()
     if not db_comment:
         raise HTTPException(status_code=404, detail="Comment not found")
     
@@ -146,15 +304,19 @@ def delete_comment(
     db.commit()
 
 @router.post("/{comment_id}/like", response_model=CommentResponse)
+@idempotent
+@rate_limited("like")
 def like_comment(
     comment_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
 ) -> Any:
     """
     Like or unlike a comment
     """
-    comment = db.query(Comment).filter(Comment.id == comment_id).first()
+    comment = db.query(Comment).filter(Comment.id == comment_id, not_deleted(Comment)).first()
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
 
@@ -167,11 +329,16 @@ def like_comment(
     if existing_like:
         # Unlike the comment
         db.delete(existing_like)
+        retract_activity(db, comment.user_id, current_user, ActivityType.like, ContentType.comment, comment_id)
     else:
         # Like the comment
         like = Like(comment_id=comment_id, user_id=current_user.id)
         db.add(like)
+        activity = record_activity(
+            db, comment.user_id, current_user, ActivityType.like, ContentType.comment, comment_id
+        )
+        background_tasks.add_task(push_activity, activity)
 
     db.commit()
     db.refresh(comment)
-    return comment 
\ No newline at end of file
+    return authors.response(CommentResponse, comment) 
\ No newline at end of file
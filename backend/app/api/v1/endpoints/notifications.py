@@ -0,0 +1,65 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.notification import ActivityNotification
+from app.models.user import User
+from app.schemas.notification import ActivityNotificationResponse
+from app.db.session import get_db
+
+router = APIRouter()
+
+@router.get("/", response_model=List[ActivityNotificationResponse])
+def get_notifications(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Get the current user's activity notifications, most recently updated first
+    """
+    return (
+        db.query(ActivityNotification)
+        .filter(ActivityNotification.recipient_id == current_user.id)
+        .order_by(ActivityNotification.updated_at.desc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+@router.put("/read-all")
+def mark_all_as_read(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Mark all of the current user's notifications as read
+    """
+    db.query(ActivityNotification).filter(
+        ActivityNotification.recipient_id == current_user.id,
+        ActivityNotification.is_read == False
+    ).update({"is_read": True})
+    db.commit()
+    return {"status": "success"}
+
+@router.put("/{notification_id}/read")
+def mark_as_read(
+    notification_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+) -> Any:
+    """
+    Mark one of the current user's notifications as read
+    """
+    notification = db.query(ActivityNotification).filter(
+        ActivityNotification.id == notification_id,
+        ActivityNotification.recipient_id == current_user.id
+    ).first()
+    if not notification:
+        raise HTTPException(status_code=404, detail="Notification not found")
+
+    notification.is_read = True
+    db.commit()
+    return {"status": "success"}
@@ -1,97 +1,242 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
 
 from app.api import deps
-from app.models import User, Post, Like
-from app.models.notification import SeverityLevel as ContentSeverity
-from app.schemas.post import PostCreate, PostResponse, PostUpdate
-from app.services.ai_moderation import ai_moderator
+from app.core.idempotency import idempotent
+from app.core.rate_limit import rate_limited
+from app.core.single_flight import single_flight
+from app.api.serializers import (
+    projection, list_response, row_serializer, etag_for, conditional_response, batch_response,
+    shared_item, shared_response
+)
+from app.models import User, Post, Like, Comment, PostDeletion
+from app.models.notification import ContentType, ActivityType
+from app.schemas.post import (
+    PostCreate, PostResponse, PostUpdate, PostSearchResponse, PostBatchResponse, PostDeletionResponse
+)
+from app.services.author_loader import AuthorLoader
+from app.services.ai_moderation import ai_moderator, moderation_columns
+from app.services.near_duplicates import near_duplicates
+from app.services.search import search_service
+from app.services.post_deletion import not_deleted, schedule_deletion
+from app.services import trending
+from app.core.config import settings
+from app.services.notification_outbox import create_moderation_notification
+from app.services.activity_notifications import record_activity, retract_activity, push_activity
+from app.services.tags import sync_post_tags
+from app.services.trending_topics import trending_topics
 from app.db.session import get_db
+from app.websocket import notify_post_updated
 
 router = APIRouter()
 
+post_reads = single_flight("get_post")
+
+# Response columns for list endpoints, with counts computed in the same query
+POST_COLUMNS = projection(
+    PostResponse,
+    Post,
+    author_id=Post.user_id,
+    like_count=select(func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery(),
+    comment_count=select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery()
+)
+# Fields that change whenever a post's response changes; content edits bump updated_at
+POST_VERSION = (
+    "id", "updated_at", "is_moderated", "is_negative", "moderation_severity",
+    "is_hidden", "like_count", "comment_count"
+)
+
 @router.post("/", response_model=PostResponse)
+@idempotent
+@rate_limited("content")
 async def create_post(
     post: PostCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
-) -> Post:
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+) -> PostResponse:
     """
     Create a new post with AI content moderation
     """
+    # Copies of recently hidden content reuse its verdict; one user's burst
+    # of copies is refused
+    duplicate = near_duplicates.check(post.content, current_user.id)
+    if duplicate.user_copies >= settings.NEAR_DUPLICATE_USER_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many similar posts, please try again later"
+        )
+
     # Analyze content using AI moderation
-    moderation_result = await ai_moderator.analyze_content(post.content)
+    moderation_result = duplicate.verdict or await ai_moderator.analyze_content(post.content)
 
     # Create post with moderation results
     db_post = Post(
         content=post.content,
         user_id=current_user.id,
-        is_moderated=True,
-        is_negative=moderation_result["is_negative"],
-        moderation_severity=moderation_result["severity"],
-        moderation_reason=moderation_result["reason"],
-        is_hidden=moderation_result["severity"] in [ContentSeverity.MEDIUM, ContentSeverity.HIGH]
+        **moderation_columns(moderation_result)
     )
 
     db.add(db_post)
+    db.flush()
+    tags, mentions = sync_post_tags(db, db_post, current_user, notify=not db_post.is_hidden)
+
+    # Queue an admin notification for flagged content, committed with the
+    # post; copies were reported with the original
+    if moderation_result["is_negative"] and duplicate.verdict is None:
+        create_moderation_notification(
+            db,
+            ContentType.post,
+            db_post.id,
+            moderation_result["severity"],
+            moderation_result["reason"]
+        )
+
     db.commit()
     db.refresh(db_post)
 
-    # If content is highly negative, notify admins (implement notification system)
-    if moderation_result["severity"] == ContentSeverity.HIGH:
-        # TODO: Implement admin notification system
-        pass
+    if not db_post.is_hidden:
+        trending_topics.add(tags)
+    for notification in mentions:
+        await push_activity(notification)
+
+    near_duplicates.add(duplicate.signature, current_user.id, moderation_result)
 
-    return db_post
+    return authors.response(PostResponse, db_post)
 
 @router.get("/", response_model=List[PostResponse])
 def get_posts(
+    request: Request,
     skip: int = 0,
     limit: int = 10,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(deps.get_current_user)
+    current_user: Optional[User] = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
 ) -> List[Post]:
     """
     Retrieve posts with moderation status
     """
     # Get posts that aren't hidden or are owned by the current user
-    posts = db.query(Post).filter(
-        (Post.is_hidden == False) | (Post.user_id == current_user.id)
-    ).order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
+    rows = db.execute(
+        select(*POST_COLUMNS)
+        .where((Post.is_hidden == False) | (Post.user_id == current_user.id), not_deleted(Post))
+        .order_by(Post.created_at.desc())
+        .offset(skip)
+        .limit(limit)
+    ).all()
+
+    # Authors are resolved up front (one query at most) so renames change the ETag
+    serialize = row_serializer(PostResponse)
+    return conditional_response(
+        request,
+        etag_for(rows, POST_VERSION, authors.embedded(row.author_id for row in rows)),
+        lambda: authors.attach([serialize(row) for row in rows])
+    )
+
+@router.get("/trending", response_model=List[PostResponse])
+def get_trending_posts(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+):
+    """
+    Retrieve posts ordered by time-decayed engagement
+    """
+    # Matches the partial ix_posts_trending index
+    rows = db.execute(
+        select(*POST_COLUMNS)
+        .where(Post.is_hidden == False, Post.hot_score > 0, not_deleted(Post))
+        .order_by(Post.hot_score.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list_response(PostResponse, rows, authors)
+
+@router.get("/search", response_model=PostSearchResponse)
+@rate_limited("search")
+def search_posts(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+):
+    """
+    Full-text search over posts, best matches first
+    """
+    rows, next_cursor = search_service.search(
+        db, Post, POST_COLUMNS, q, current_user.id, limit, cursor
+    )
+    serialize = row_serializer(PostResponse)
+    return ORJSONResponse({
+        "items": authors.attach([serialize(row) for row in rows]),
+        "next_cursor": next_cursor
+    })
 
-    return posts
+@router.get("/batch", response_model=PostBatchResponse)
+def get_posts_batch(
+    ids: List[int] = Depends(deps.get_batch_ids),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+):
+    """
+    Get several posts by id with one query, in request order; hidden posts
+    of other users are reported as missing, like get_post's 403
+    """
+    rows = db.execute(select(*POST_COLUMNS).where(Post.id.in_(set(ids)), not_deleted(Post)))
+    return batch_response(
+        PostResponse, ids, rows, lambda post: post.is_hidden and post.author_id != current_user.id, authors
+    )
 
 @router.get("/{post_id}", response_model=PostResponse)
 def get_post(
     post_id: int,
+    request: Request,
     db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(deps.get_current_user)
+    current_user: Optional[User] = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
 ) -> Post:
     """
     Get a specific post by ID
     """
-    post = db.query(Post).filter(Post.id == post_id).first()
-    if not post:
+    # Concurrent reads of the same post share one query and one rendered
+    # body; visibility is checked per viewer afterwards
+    shared = post_reads.do(post_id, lambda: shared_item(
+        PostResponse,
+        db.execute(select(*POST_COLUMNS).where(Post.id == post_id, not_deleted(Post))).first(),
+        POST_VERSION,
+        authors
+    ))
+    if not shared:
         raise HTTPException(status_code=404, detail="Post not found")
 
     # Check if post is hidden and user is not the author
-    if post.is_hidden and post.user_id != current_user.id:
+    post = shared.rows[0]
+    if post.is_hidden and post.author_id != current_user.id:
         raise HTTPException(status_code=403, detail="Post is hidden due to content violation")
 
-    return post
+    return shared_response(request, shared)
 
 @router.put("/{post_id}", response_model=PostResponse)
+@rate_limited("content")
 async def update_post(
     post_id: int,
     post_update: PostUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
-) -> Post:
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+) -> PostResponse:
     """
     Update a post with new AI content moderation
     """
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    db_post = db.query(Post).filter(Post.id == post_id, not_deleted(Post)).first()
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
     
@@ -103,46 +248,86 @@ async def update_post(
 
     # Update post with new content and moderation results
     db_post.content = post_update.content
-    db_post.is_moderated = True
-    db_post.is_negative = moderation_result["is_negative"]
-    db_post.moderation_severity = moderation_result["severity"]
-    db_post.moderation_reason = moderation_result["reason"]
-    db_post.is_hidden = moderation_result["severity"] in [ContentSeverity.MEDIUM, ContentSeverity.HIGH]
+    for key, value in moderation_columns(moderation_result).items():
+        setattr(db_post, key, value)
+    tags, mentions = sync_post_tags(db, db_post, current_user, notify=not db_post.is_hidden)
+
+    # Queue an admin notification for flagged content, committed with the edit
+    if moderation_result["is_negative"]:
+        create_moderation_notification(
+            db,
+            ContentType.post,
+            db_post.id,
+            moderation_result["severity"],
+            moderation_result["reason"]
+        )
 
     db.commit()
     db.refresh(db_post)
 
-    return db_post
+    if not db_post.is_hidden:
+        trending_topics.add(tags)
+    for notification in mentions:
+        await push_activity(notification)
+
+    return authors.response(PostResponse, db_post)
 
-@router.delete("/{post_id}", status_code=status.HTTP_204_NO_CONTENT)
+@router.delete("/{post_id}", response_model=PostDeletionResponse, status_code=status.HTTP_202_ACCEPTED)
 def delete_post(
     post_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(deps.get_current_user)
 ):
     """
-    Delete a post
+    Delete a post. It disappears from every read at once; its comments and
+    likes are removed in the background, tracked by the returned job (see
+    GET /posts/{post_id}/deletion). Deleting it again returns the same job.
     """
-    db_post = db.query(Post).filter(Post.id == post_id).first()
+    # Locked so concurrent deletes queue a single job
+    db_post = db.query(Post).filter(Post.id == post_id).with_for_update().first()
     if not db_post:
         raise HTTPException(status_code=404, detail="Post not found")
     
     if db_post.user_id != current_user.id and not current_user.is_superuser:
         raise HTTPException(status_code=403, detail="Not authorized to delete this post")
 
-    db.delete(db_post)
+    if db_post.deleted_at is not None:
+        db.rollback()
+        return db.query(PostDeletion).filter(PostDeletion.post_id == post_id).first()
+
+    job = schedule_deletion(db, db_post, current_user)
     db.commit()
+    db.refresh(job)
+    return job
+
+@router.get("/{post_id}/deletion", response_model=PostDeletionResponse)
+def get_post_deletion(
+    post_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Progress of a post's deletion, for whoever deleted it or a superuser
+    """
+    job = db.query(PostDeletion).filter(PostDeletion.post_id == post_id).first()
+    if not job or (job.requested_by != current_user.id and not current_user.is_superuser):
+        raise HTTPException(status_code=404, detail="Deletion not found")
+    return job
 
 @router.post("/{post_id}/like", response_model=PostResponse)
+@idempotent
+@rate_limited("like")
 def like_post(
     post_id: int,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(deps.get_current_user)
-) -> Post:
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+) -> PostResponse:
     """
     Like or unlike a post
     """
-    post = db.query(Post).filter(Post.id == post_id).first()
+    post = db.query(Post).filter(Post.id == post_id, not_deleted(Post)).first()
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
 
@@ -155,11 +340,24 @@ def like_post(
     if existing_like:
         # Unlike the post
         db.delete(existing_like)
+        trending.bump(db, post_id, -settings.TRENDING_LIKE_WEIGHT)
+        retract_activity(db, post.user_id, current_user, ActivityType.like, ContentType.post, post_id)
     else:
         # Like the post
         like = Like(post_id=post_id, user_id=current_user.id)
         db.add(like)
+        trending.bump(db, post_id, settings.TRENDING_LIKE_WEIGHT)
+        activity = record_activity(
+            db, post.user_id, current_user, ActivityType.like, ContentType.post, post_id
+        )
+        background_tasks.add_task(push_activity, activity)
 
     db.commit()
     db.refresh(post)
-    return post 
\ No newline at end of file
+    response = authors.response(PostResponse, post)
+    # Keyed by post, so during a like storm coalescing clients get the
+    # latest counts once per window
+    background_tasks.add_task(notify_post_updated, {
+        "id": post_id, "like_count": response.like_count, "comment_count": response.comment_count
+    })
+    return response
\ No newline at end of file
@@ -0,0 +1,54 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.api.serializers import list_response
+from app.api.v1.endpoints.posts import POST_COLUMNS
+from app.models import User, Post, Hashtag, PostHashtag
+from app.schemas.post import PostResponse
+from app.schemas.tag import TrendingTag
+from app.services.author_loader import AuthorLoader
+from app.services.post_deletion import not_deleted
+from app.services.trending_topics import trending_topics
+from app.db.session import get_db
+
+router = APIRouter()
+
+@router.get("/trending", response_model=List[TrendingTag])
+def get_trending_tags(
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Most used hashtags over the recent windows (approximate counts)
+    """
+    return [{"tag": tag, "count": count} for tag, count in trending_topics.top(limit)]
+
+@router.get("/{name}/posts", response_model=List[PostResponse])
+def get_tag_posts(
+    name: str,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+    authors: AuthorLoader = Depends(deps.get_author_loader)
+):
+    """
+    Retrieve the newest posts carrying a hashtag
+    """
+    rows = db.execute(
+        select(*POST_COLUMNS)
+        .join(PostHashtag, PostHashtag.post_id == Post.id)
+        .join(Hashtag, Hashtag.id == PostHashtag.hashtag_id)
+        .where(
+            Hashtag.name == name.lstrip("#").lower(),
+            (Post.is_hidden == False) | (Post.user_id == current_user.id),
+            not_deleted(Post)
+        )
+        .order_by(Post.id.desc())
+        .offset(skip)
+        .limit(limit)
+    )
+    return list_response(PostResponse, rows, authors)
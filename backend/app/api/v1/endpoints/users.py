@@ -1,15 +1,24 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.api import deps
+from app.api.serializers import projection, list_response, row_serializer, batch_response, SharedBody, render_json
+from app.core.single_flight import single_flight
 from app.core.security import get_password_hash
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate, UserResponse
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserBatchResponse
+from app.services.author_loader import author_cache
 from app.db.session import get_db
+from app.websocket import manager
 
 router = APIRouter()
 
+USER_COLUMNS = projection(UserResponse, User)
+
+user_reads = single_flight("read_user_by_id")
+
 @router.get("/me", response_model=UserResponse)
 def read_user_me(
     current_user: User = Depends(deps.get_current_user),
@@ -56,8 +65,42 @@ def update_user_me(
     db.add(current_user)
     db.commit()
     db.refresh(current_user)
+    # Posts and comments embed the old name until the cached summary goes
+    author_cache.invalidate(current_user.id)
     return current_user
 
+@router.get("/online", response_model=dict)
+def read_online_users(
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    List users with at least one live WebSocket connection.
+    """
+    user_ids = manager.online_users()
+    return {"count": len(user_ids), "user_ids": user_ids}
+
+@router.get("/{user_id}/presence", response_model=dict)
+def read_user_presence(
+    user_id: int,
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Check whether a user is online.
+    """
+    return {"user_id": user_id, "online": manager.is_online(user_id)}
+
+@router.get("/batch", response_model=UserBatchResponse)
+def read_users_batch(
+    ids: List[int] = Depends(deps.get_batch_ids),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Get several users by id with one query, in request order.
+    """
+    rows = db.execute(select(*USER_COLUMNS).where(User.id.in_(set(ids))))
+    return batch_response(UserResponse, ids, rows)
+
 @router.get("/{user_id}", response_model=UserResponse)
 def read_user_by_id(
     user_id: int,
@@ -67,13 +110,18 @@ def read_user_by_id(
     """
     Get a specific user by id.
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
+    # Profile views of the same user share one query and one rendered body
+    def load() -> Optional[SharedBody]:
+        user = db.execute(select(*USER_COLUMNS).where(User.id == user_id)).first()
+        return SharedBody([user], render_json(row_serializer(UserResponse)(user))) if user else None
+
+    shared = user_reads.do(user_id, load)
+    if not shared:
         raise HTTPException(
             status_code=404,
             detail="User not found",
         )
-    return user
+    return Response(shared.body, media_type="application/json")
 
 @router.get("/", response_model=List[UserResponse])
 def read_users(
@@ -85,5 +133,5 @@ def read_users(
     """
     Retrieve users.
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users 
\ No newline at end of file
+    rows = db.execute(select(*USER_COLUMNS).order_by(User.id).offset(skip).limit(limit))
+    return list_response(UserResponse, rows) 
\ No newline at end of file
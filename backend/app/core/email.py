@@ -1 +1,50 @@
- 
\ No newline at end of file
+import smtplib
+from email.message import EmailMessage
+from typing import Any, Dict, List
+from app.core.config import settings
+
+def email_enabled() -> bool:
+    """Whether an SMTP server is configured."""
+    return bool(settings.MAIL_SERVER)
+
+def send_email(recipients: List[str], subject: str, body: str) -> None:
+    """Send a plain-text email through the configured SMTP server."""
+    message = EmailMessage()
+    message["From"] = settings.MAIL_FROM or "noreply@example.com"
+    message["To"] = ", ".join(recipients)
+    message["Subject"] = subject
+    message.set_content(body)
+
+    with smtplib.SMTP(settings.MAIL_SERVER, settings.MAIL_PORT or 587, timeout=10) as smtp:
+        if settings.MAIL_STARTTLS:
+            smtp.starttls()
+        if settings.MAIL_USERNAME:
+            smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD or "")
+        smtp.send_message(message)
+
+def send_moderation_alert(
+    admin_emails: List[str],
+    content_type: str,
+    content_id: int,
+    severity: str,
+    reason: str
+) -> None:
+    """Send a single moderation alert email."""
+    send_email(
+        admin_emails,
+        f"[Moderation] {severity} severity {content_type} #{content_id}",
+        f"{content_type.capitalize()} #{content_id} was flagged as {severity} severity.\n\nReason: {reason}\n"
+    )
+
+def send_moderation_digest(admin_emails: List[str], alerts: List[Dict[str, Any]]) -> None:
+    """Send one email summarizing a burst of moderation alerts."""
+    lines = [
+        f"- {alert['severity']} {alert['contentType']} #{alert['contentId']} "
+        f"at {alert['createdAt']}: {alert['content']}"
+        for alert in alerts
+    ]
+    send_email(
+        admin_emails,
+        f"[Moderation] {len(alerts)} high severity alert(s)",
+        "The following content was flagged:\n\n" + "\n".join(lines) + "\n"
+    )
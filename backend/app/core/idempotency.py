@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import time
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+from sqlalchemy import delete, or_, select
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.core.rate_limit import caller
+from app.db.session import SessionLocal, dialect_insert
+from app.models.idempotency import IdempotencyKey
+from app.models.outbox import utcnow
+
+HEADER = b"idempotency-key"
+REPLAYED_HEADER = (b"idempotent-replayed", b"true")
+PURGE_INTERVAL = 600  # seconds between sweeps of expired keys, per process
+POLL_INTERVAL = 0.1  # seconds between checks on an attempt in another process
+
+def idempotent(endpoint: Callable) -> Callable:
+    """Opt an endpoint into Idempotency-Key handling by IdempotencyMiddleware"""
+    endpoint.idempotent = True
+    return endpoint
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response when a client retries an @idempotent endpoint
+    with the same Idempotency-Key. Keys are scoped to the caller (the
+    token's user, so a refreshed token still matches) and the route, stored
+    in idempotency_keys for IDEMPOTENCY_TTL, and claimed with an insert before the endpoint runs, so
+    a concurrent duplicate (in any process) waits for the first attempt's
+    response instead of running the endpoint twice. Reusing a key with a
+    different request is rejected with 422. Server errors are not stored,
+    so the client may retry them.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self._finished: Dict[str, asyncio.Event] = {}
+        self._purged_at = 0.0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "POST":
+            return await self.app(scope, receive, send)
+        key = dict(scope["headers"]).get(HEADER)
+        route = self._route(scope) if key else None
+        if route is None:
+            return await self.app(scope, receive, send)
+
+        body = await self._read_body(receive)
+        key_id = hashlib.sha256(
+            b"\0".join((caller(scope).encode(), route.encode(), key))
+        ).hexdigest()
+        request_hash = hashlib.sha256(
+            b"\0".join((scope["path"].encode(), scope["query_string"], body))
+        ).hexdigest()
+
+        if time.monotonic() - self._purged_at > PURGE_INTERVAL:
+            self._purged_at = time.monotonic()
+            await asyncio.to_thread(self._purge)
+
+        if await asyncio.to_thread(self._claim, key_id, request_hash):
+            return await self._run(scope, body, send, key_id)
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            stored = await asyncio.to_thread(self._load, key_id)
+            if stored is None:
+                # The first attempt failed or expired; this one takes over
+                if await asyncio.to_thread(self._claim, key_id, request_hash):
+                    return await self._run(scope, body, send, key_id)
+                continue
+            if stored.request_hash != request_hash:
+                return await self._respond(send, 422, b'{"detail":"Idempotency-Key was used with a different request"}')
+            if stored.status_code is not None:
+                return await self._replay(send, stored)
+            if time.monotonic() >= deadline:
+                return await self._respond(send, 409, b'{"detail":"A request with this Idempotency-Key is still in progress"}')
+            # Woken directly when the first attempt runs in this process
+            event = self._finished.get(key_id)
+            try:
+                await asyncio.wait_for(event.wait() if event else asyncio.sleep(POLL_INTERVAL), POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    def _route(self, scope: Scope) -> Optional[str]:
+        """Path template of the matching route if its endpoint is @idempotent"""
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path if getattr(route.endpoint, "idempotent", False) else None
+        return None
+
+    async def _read_body(self, receive: Receive) -> bytes:
+        chunks = []
+        while True:
+            message = await receive()
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _run(self, scope: Scope, body: bytes, send: Send, key_id: str):
+        status_code = None
+        headers: List = []
+        chunks: List[bytes] = []
+        delivered = False
+
+        async def receive() -> Message:
+            nonlocal delivered
+            if delivered:
+                # Nothing more to read; wait like a client that keeps the connection open
+                await asyncio.Event().wait()
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def capture(message: Message):
+            nonlocal status_code, headers
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = message.get("headers", [])
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        self._finished[key_id] = asyncio.Event()
+        stored = False
+        try:
+            await self.app(scope, receive, capture)
+            if status_code is not None and status_code < 500:
+                await asyncio.to_thread(self._store, key_id, status_code, headers, b"".join(chunks))
+                stored = True
+        finally:
+            if not stored:
+                await asyncio.to_thread(self._release, key_id)
+            self._finished.pop(key_id).set()
+
+    async def _replay(self, send: Send, stored: IdempotencyKey):
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers]
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers + [REPLAYED_HEADER]})
+        await send({"type": "http.response.body", "body": stored.body})
+
+    async def _respond(self, send: Send, status_code: int, body: bytes):
+        await send({
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    def _claim(self, key_id: str, request_hash: str) -> bool:
+        """Insert the key as in flight; False if it already exists and is live"""
+        now = utcnow()
+        db = SessionLocal()
+        try:
+            # Expired keys and attempts abandoned by a dead worker can be reclaimed
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.id == key_id,
+                or_(
+                    IdempotencyKey.expires_at < now,
+                    IdempotencyKey.status_code.is_(None)
+                    & (IdempotencyKey.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT))
+                )
+            ))
+            claimed = db.execute(
+                dialect_insert(db, IdempotencyKey)
+                .values(
+                    id=key_id,
+                    request_hash=request_hash,
+                    created_at=now,
+                    expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_TTL)
+                )
+                .on_conflict_do_nothing(index_elements=["id"])
+                .returning(IdempotencyKey.id)
+            ).first()
+            db.commit()
+            return claimed is not None
+        finally:
+            db.close()
+
+    def _load(self, key_id: str) -> Optional[IdempotencyKey]:
+        db = SessionLocal()
+        try:
+            return db.execute(select(IdempotencyKey).where(IdempotencyKey.id == key_id)).scalar_one_or_none()
+        finally:
+            db.close()
+
+    def _store(self, key_id: str, status_code: int, headers: List, body: bytes):
+        db = SessionLocal()
+        try:
+            stored = db.get(IdempotencyKey, key_id)
+            if stored is not None:
+                stored.status_code = status_code
+                stored.headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in headers]
+                stored.body = body
+                db.commit()
+        finally:
+            db.close()
+
+    def _release(self, key_id: str):
+        db = SessionLocal()
+        try:
+            db.execute(delete(IdempotencyKey).where(
+                IdempotencyKey.id == key_id, IdempotencyKey.status_code.is_(None)
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def _purge(self):
+        db = SessionLocal()
+        try:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.expires_at < utcnow()))
+            db.commit()
+        finally:
+            db.close()
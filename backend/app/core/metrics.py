@@ -0,0 +1,149 @@
+import os
+import time
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Optional
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# With several worker processes set PROMETHEUS_MULTIPROC_DIR so /metrics
+# aggregates all of them
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route"]
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being served", multiprocess_mode="livesum"
+)
+DB_QUERIES = Counter(
+    "db_queries_total", "SQL statements executed", ["operation"]
+)
+DB_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement latency", ["operation"],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5)
+)
+MODERATION_LATENCY = Histogram(
+    "moderation_request_duration_seconds", "Moderation API request latency", ["outcome"],
+    buckets=(.05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+WS_CONNECTIONS = Gauge(
+    "websocket_connections", "Open WebSocket connections", multiprocess_mode="livesum"
+)
+WS_DELIVERY_LATENCY = Histogram(
+    "websocket_delivery_duration_seconds", "Time to fan a message out to its connections", ["kind"]
+)
+WS_FRAMES = Counter(
+    "websocket_frames_total", "WebSocket frames sent", ["outcome"]
+)
+SINGLE_FLIGHT_CALLS = Counter(
+    "single_flight_calls_total", "Reads through a single-flight group", ["group"]
+)
+SINGLE_FLIGHT_COALESCED = Counter(
+    "single_flight_coalesced_total", "Reads that joined an in-flight query", ["group"]
+)
+RATE_LIMITED = Counter(
+    "rate_limited_total", "Requests rejected by the rate limiter", ["limit"]
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Scope of the HTTP request being served; copied into the threadpool with
+# the rest of the context, so sync endpoints and their queries see it too
+current_request: ContextVar[Optional[Scope]] = ContextVar("current_request", default=None)
+
+def route_template(scope: Scope) -> str:
+    # The router stores the matched route in the scope
+    return getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+
+def current_endpoint() -> Optional[str]:
+    """Method and route template of the request this code runs for, if any"""
+    scope = current_request.get()
+    return None if scope is None else f"{scope['method']} {route_template(scope)}"
+
+class MetricsMiddleware:
+    """
+    Counts and times HTTP requests labeled by route template
+    (/api/v1/posts/{post_id}), never the raw path, so label cardinality stays
+    bounded. Requests that match no route share one label. Costs about 20 us
+    per request (benchmarks/metrics_overhead.py).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def capture(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_PROGRESS.inc()
+        request_token = current_request.set(scope)
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            current_request.reset(request_token)
+            HTTP_IN_PROGRESS.dec()
+            template = route_template(scope)
+            HTTP_LATENCY.labels(scope["method"], template).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(scope["method"], template, str(status_code)).inc()
+
+def instrument_engine(engine: Engine):
+    """
+    Time every statement the engine executes. Costs about 25 us per
+    statement, half of it SQLAlchemy's event dispatch
+    (benchmarks/metrics_overhead.py).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "UNKNOWN"
+        DB_QUERIES.labels(operation).inc()
+        DB_LATENCY.labels(operation).observe(elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None and context.connection.info.get("query_started"):
+            context.connection.info["query_started"].pop()
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """Decorator observing a coroutine's duration"""
+    def decorator(fn):
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                histogram.labels(**labels).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Prometheus exposition of this process, or of all workers in multiprocess mode"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,114 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from uuid import uuid4
+from app.core.config import settings
+
+PROFILE_ID = re.compile(r"^\d+-[0-9a-f]{8}$")
+# Leaf frames in these modules mean the thread is parked, not working
+IDLE_MODULES = {"threading.py", "selectors.py", "queue.py"}
+
+class StackSampler(threading.Thread):
+    """
+    Samples the stacks of every other thread at a fixed interval into
+    collapsed-stack counts. Sync endpoints run in threadpool workers and
+    async ones on the event loop, so all threads are sampled; requests
+    running concurrently with the profiled one show up too.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name="request-profiler", daemon=True)
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self):
+        own = threading.get_ident()
+        while not self._stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or os.path.basename(frame.f_code.co_filename) in IDLE_MODULES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)).replace(" ", "_"))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+class ProfileStore:
+    """Profiles as <id>.collapsed plus <id>.json metadata; only the newest PROFILE_MAX_FILES are kept"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def save(self, metadata: Dict, samples: Counter) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        profile_id = f"{int(time.time() * 1000)}-{uuid4().hex[:8]}"
+        with open(self.path(profile_id), "w") as f:
+            f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        with open(os.path.join(self.directory, f"{profile_id}.json"), "w") as f:
+            json.dump({"id": profile_id, "samples": sum(samples.values()), **metadata}, f)
+        self._prune()
+        return profile_id
+
+    def list(self) -> List[Dict]:
+        profiles = []
+        for profile_id in self._ids()[::-1]:
+            try:
+                with open(os.path.join(self.directory, f"{profile_id}.json")) as f:
+                    profiles.append(json.load(f))
+            except FileNotFoundError:
+                continue  # pruned by another worker meanwhile
+        return profiles
+
+    def path(self, profile_id: str) -> Optional[str]:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        return os.path.join(self.directory, f"{profile_id}.collapsed")
+
+    def _ids(self) -> List[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        ids = [name[:-len(".collapsed")] for name in os.listdir(self.directory) if name.endswith(".collapsed")]
+        return sorted(ids, key=lambda profile_id: int(profile_id.split("-")[0]))
+
+    def _prune(self):
+        ids = self._ids()
+        for profile_id in ids[:max(len(ids) - settings.PROFILE_MAX_FILES, 0)]:
+            for suffix in (".collapsed", ".json"):
+                try:
+                    os.remove(os.path.join(self.directory, profile_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+profile_store = ProfileStore(settings.PROFILE_DIR)
+
+@contextmanager
+def profile(method: str, route: str, reason: str) -> Iterator[None]:
+    """Sample stacks for the duration of the block and store them"""
+    sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+    started = time.perf_counter()
+    sampler.start()
+    try:
+        yield
+    finally:
+        sampler.stop()
+        profile_store.save({
+            "method": method,
+            "route": route,
+            "reason": reason,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "created_at": time.time()
+        }, sampler.samples)
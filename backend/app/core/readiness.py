@@ -0,0 +1,117 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.db.session import Base, engine
+from app.services.ai_moderation import ai_moderator
+
+class Readiness:
+    """
+    Startup and readiness state of this process. The lifespan hook runs
+    ``startup`` before the server accepts connections: it creates missing
+    tables and pre-warms the database pool and the moderation client, so
+    the first requests don't pay for connection setup. ``check`` backs
+    /ready; /health stays a liveness probe that checks nothing.
+    """
+
+    def __init__(self):
+        self.state = "starting"
+        self.timings: Dict[str, float] = {}
+        self.moderation_reachable: Optional[bool] = None
+
+    async def startup(self):
+        started = time.perf_counter()
+        if settings.DB_CREATE_ALL:
+            await self._timed("create_all", asyncio.to_thread(Base.metadata.create_all, bind=engine))
+        if settings.STARTUP_PREWARM:
+            # Moderation is warmed alongside the pool; an unreachable backend
+            # is reported by /ready but doesn't stop the app from starting
+            await asyncio.gather(
+                self._timed("warm_pool", asyncio.to_thread(self._warm_pool)),
+                self._timed("warm_moderation", self._warm_moderation())
+            )
+        self.timings["startup"] = round(time.perf_counter() - started, 4)
+
+    async def _timed(self, name: str, work):
+        started = time.perf_counter()
+        try:
+            return await work
+        finally:
+            self.timings[name] = round(time.perf_counter() - started, 4)
+
+    async def _warm_moderation(self):
+        self.moderation_reachable = await asyncio.to_thread(ai_moderator.warm)
+
+    def _warm_pool(self):
+        """Check out as many connections as the pool keeps, all at once, so each one gets opened"""
+        size = engine.pool.size() if hasattr(engine.pool, "size") else 1
+        connections = []
+        try:
+            for _ in range(size):
+                connection = engine.connect()
+                connections.append(connection)
+                connection.exec_driver_sql("SELECT 1")
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def _pool_status(self) -> Dict:
+        pool = engine.pool
+        if not hasattr(pool, "checkedout"):
+            return {"status": "ok"}
+        # QueuePool: size() connections kept, up to _max_overflow more on demand
+        capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+        checked_out = pool.checkedout()
+        return {
+            "status": "exhausted" if checked_out >= capacity else "ok",
+            "checked_out": checked_out,
+            "idle": pool.checkedin(),
+            "capacity": capacity
+        }
+
+    def _ping_database(self):
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+
+    async def _database_status(self, pool: Dict) -> Dict:
+        if pool["status"] == "exhausted":
+            # Waiting for a connection would only pile up blocked threads
+            return {"status": "unknown"}
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(self._ping_database), settings.READINESS_TIMEOUT)
+        except asyncio.TimeoutError:
+            return {"status": "timeout"}
+        except Exception as e:
+            return {"status": "error", "error": str(e)}
+        return {"status": "ok", "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+
+    def _moderation_status(self) -> Dict:
+        # From the last real call, so probes never add inference traffic
+        outcome = ai_moderator.last_outcome
+        status = {"ok": "ok", "reachable": "ok", "error": "failing"}.get(outcome, outcome or "unknown")
+        result = {"status": status}
+        if ai_moderator.last_error:
+            result["error"] = ai_moderator.last_error
+        return result
+
+    async def check(self) -> Tuple[bool, Dict]:
+        """Whether this process should receive traffic, with per-dependency detail"""
+        if self.state != "ready":
+            return False, {"status": self.state}
+        pool = self._pool_status()
+        checks = {
+            "database": await self._database_status(pool),
+            "pool": pool,
+            # Content is still accepted while moderation fails, so it is
+            # reported but doesn't take the process out of rotation
+            "moderation": self._moderation_status()
+        }
+        ready = checks["database"]["status"] == "ok" and pool["status"] == "ok"
+        return ready, {
+            "status": "ready" if ready else "not_ready",
+            "checks": checks,
+            "startup_seconds": self.timings
+        }
+
+readiness = Readiness()
@@ -0,0 +1,65 @@
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, TypeVar
+from app.core.metrics import SINGLE_FLIGHT_CALLS, SINGLE_FLIGHT_COALESCED
+
+T = TypeVar("T")
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads: while a call for a key is running,
+    other callers with the same key wait for and share its result instead
+    of querying again. Nothing is kept once the call finishes, so results
+    are never older than the flight they joined. Thread-based, for sync
+    endpoints running in the threadpool.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        with self._lock:
+            self.calls += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = Future()
+            else:
+                self.coalesced += 1
+        SINGLE_FLIGHT_CALLS.labels(self.name).inc()
+        if not leader:
+            SINGLE_FLIGHT_COALESCED.labels(self.name).inc()
+            return flight.result()
+
+        try:
+            result = fn()
+            flight.set_result(result)
+            return result
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+
+    @property
+    def coalescing_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+_registry: Dict[str, SingleFlight] = {}
+
+def single_flight(name: str) -> SingleFlight:
+    """The process-wide SingleFlight group for ``name``"""
+    if name not in _registry:
+        _registry[name] = SingleFlight(name)
+    return _registry[name]
+
+def single_flight_stats() -> Dict[str, Dict]:
+    return {
+        name: {"calls": group.calls, "coalesced": group.coalesced, "rate": round(group.coalescing_rate, 4)}
+        for name, group in _registry.items()
+    }
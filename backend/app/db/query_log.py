@@ -0,0 +1,103 @@
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+from app.core.metrics import current_endpoint
+
+logger = logging.getLogger("app.db.slow_query")
+
+class QueryCounter:
+    """Statements executed while a count_queries() block is active"""
+
+    def __init__(self):
+        self.statements: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def __repr__(self):
+        return f"<QueryCounter(count={self.count})>"
+
+    def add(self, statement: str):
+        with self._lock:
+            self.statements.append(statement)
+
+# Counters of the enclosing count_queries() blocks. Context-local, so
+# background workers started elsewhere (outbox dispatcher, post deletion,
+# trending decay) never land in a test's count
+_counters: ContextVar[Tuple[QueryCounter, ...]] = ContextVar("query_counters", default=())
+
+@contextmanager
+def count_queries(max_queries: Optional[int] = None) -> Iterator[QueryCounter]:
+    """
+    Record every statement run inside the block, including by the threadpool
+    calls it makes (they copy the context); raise AssertionError on exit when
+    more than ``max_queries`` ran. Meant for tests and benchmarks catching
+    N+1 queries, with the app driven in process through httpx.ASGITransport
+    (see benchmarks/query_counts.py).
+    """
+    counter = QueryCounter()
+    token = _counters.set(_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _counters.reset(token)
+    if max_queries is not None and counter.count > max_queries:
+        listing = "\n".join(counter.statements)
+        raise AssertionError(f"Expected at most {max_queries} queries, got {counter.count}:\n{listing}")
+
+def _explain(conn, statement: str, parameters) -> Optional[str]:
+    """Plan of a slow SELECT, run on a separate cursor so results are untouched"""
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+    except Exception as e:
+        return f"EXPLAIN failed: {e}"
+    finally:
+        cursor.close()
+
+def install_query_hooks(engine: Engine):
+    """Statement counting for count_queries() and the slow-query log"""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_log_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_log_started"].pop()
+        for counter in _counters.get():
+            counter.add(statement)
+
+        threshold = settings.SLOW_QUERY_THRESHOLD_MS
+        if threshold <= 0 or elapsed * 1000 < threshold:
+            return
+        plan = None
+        if (
+            not executemany
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        ):
+            plan = _explain(conn, statement, parameters)
+        endpoint = current_endpoint()
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s\nParameters: %r%s",
+            elapsed * 1000, endpoint or "background work", statement, parameters,
+            f"\nPlan:\n{plan}" if plan else "",
+            extra={"endpoint": endpoint}
+        )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        if context.connection is not None and context.connection.info.get("query_log_started"):
+            context.connection.info["query_log_started"].pop()
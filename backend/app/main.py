@@ -1,13 +1,44 @@
-from fastapi import FastAPI, WebSocket, Query
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, WebSocket, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from app.core.config import settings
+from app.core.idempotency import IdempotencyMiddleware
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.metrics import MetricsMiddleware, instrument_engine, metrics_endpoint
 from app.api.v1 import api_router
-from app.db.session import engine, Base
+from app.api.deps import profile_request
+from app.core.readiness import readiness
+from app.db.session import engine
 from app.websocket import handle_websocket
+from app.services.notification_outbox import notification_dispatcher
+from app.services.notification_partitions import notification_partitions
+from app.services.trending import trending_decay
+from app.services.remoderation import remoderation_job
+from app.services.post_deletion import post_deletions
 import uvicorn
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing touches the database or the network at import time; it all
+    # happens here, before the server accepts connections
+    await readiness.startup()
+    # Partitions for the current month must exist before notifications are written
+    await notification_partitions.maintain_safely()
+    notification_partitions.start()
+    notification_dispatcher.start()
+    trending_decay.start()
+    remoderation_job.resume()
+    post_deletions.start()
+    readiness.state = "ready"
+    yield
+    readiness.state = "stopping"
+    await notification_dispatcher.stop()
+    await notification_partitions.stop()
+    await trending_decay.stop()
+    await remoderation_job.stop()
+    await post_deletions.stop()
 
 # Create FastAPI app
 app = FastAPI(
@@ -38,9 +69,16 @@ app = FastAPI(
     },
     license_info={
         "name": "MIT",
-    }
+    },
+    lifespan=lifespan
 )
 
+# Innermost, so stored responses are uncompressed and replays pass through CORS
+app.add_middleware(IdempotencyMiddleware)
+
+# Inside CORS, so browsers can read 429 responses and their headers
+app.add_middleware(RateLimitMiddleware)
+
 # Configure CORS with more permissive settings for development
 app.add_middleware(
     CORSMiddleware,
@@ -51,20 +89,37 @@ app.add_middleware(
     max_age=3600,
 )
 
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
+# Outermost, so timings cover every other middleware
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+
 # Include API router
-app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(api_router, prefix=settings.API_V1_STR, dependencies=[Depends(profile_request)])
+
+# Prometheus scrape target; keep it off the public network
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 @app.websocket("/ws")
 async def websocket_endpoint(
     websocket: WebSocket,
-    token: str = Query(...)
+    token: str = Query(...),
+    coalesce_ms: int = Query(0, ge=0, le=settings.WS_MAX_COALESCE_MS)
 ):
-    await handle_websocket(websocket, token)
+    await handle_websocket(websocket, token, coalesce_ms)
 
 @app.get("/health")
 def health_check():
+    """Liveness: the process is up and serving"""
     return {"status": "healthy"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: startup finished and the database is reachable with pool capacity left"""
+    ready, body = await readiness.check()
+    return ORJSONResponse(body, status_code=200 if ready else 503)
+
 @app.get("/")
 async def root():
     """Root endpoint to check if API is running."""
@@ -75,4 +130,10 @@ async def root():
     }
 
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "app.main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=True,
+        ws_per_message_deflate=settings.WS_PER_MESSAGE_DEFLATE
+    )
@@ -5,9 +5,16 @@ from .like import Like
 from .notification import (
     Notification,
     NotificationType,
+    ActivityNotification,
+    ActivityType,
     ContentType,
     SeverityLevel
 )
+from .outbox import OutboxMessage, OutboxChannel, OutboxStatus
+from .job import JobState
+from .tag import Hashtag, PostHashtag, PostMention
+from .idempotency import IdempotencyKey
+from .deletion import PostDeletion, DeletionStatus
 
 # Import any other models here
 
@@ -18,6 +25,18 @@ __all__ = [
     "Like",
     "Notification",
     "NotificationType",
+    "ActivityNotification",
+    "ActivityType",
     "ContentType",
-    "SeverityLevel"
+    "SeverityLevel",
+    "OutboxMessage",
+    "OutboxChannel",
+    "OutboxStatus",
+    "JobState",
+    "Hashtag",
+    "PostHashtag",
+    "PostMention",
+    "IdempotencyKey",
+    "PostDeletion",
+    "DeletionStatus"
 ] 
\ No newline at end of file
@@ -1,17 +1,25 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Enum, Float, Index, func, literal_column
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from app.db.session import Base
 from app.models.notification import SeverityLevel
 
 class Comment(Base):
     __tablename__ = "comments"
+    # Full-text search index maintained by PostgreSQL; queries in
+    # app/services/search.py must use the same expression
+    __table_args__ = (
+        Index(
+            "ix_comments_content_fts",
+            func.to_tsvector(literal_column("'english'::regconfig"), literal_column("content")),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False)
-    parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True)
+    post_id = Column(Integer, ForeignKey("posts.id"), nullable=False, index=True)
+    parent_id = Column(Integer, ForeignKey("comments.id"), nullable=True, index=True)
     
     # Moderation fields
     is_moderated = Column(Boolean, default=False)
@@ -19,6 +27,11 @@ class Comment(Base):
     moderation_severity = Column(Enum(SeverityLevel), nullable=True)
     moderation_reason = Column(String, nullable=True)
     is_hidden = Column(Boolean, default=False)
+    # Raw classifier scores and the policy version that turned them into
+    # the verdict above, see app/services/moderation_policy.py
+    hate_score = Column(Float, nullable=True)
+    offensive_score = Column(Float, nullable=True)
+    moderation_policy_version = Column(Integer, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -36,4 +49,4 @@ class Comment(Base):
 
     @property
     def reply_count(self) -> int:
-        return len(self.replies) 
\ No newline at end of file
+        return len(self.replies)
@@ -0,0 +1,37 @@
+from sqlalchemy import Column, Integer, String, DateTime, Enum, ForeignKey, Index
+import enum
+from app.db.session import Base
+from app.models.outbox import utcnow
+
+class DeletionStatus(str, enum.Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class PostDeletion(Base):
+    """
+    Cascade of a soft-deleted post, carried out in batches by
+    app/services/post_deletion.py; kept once done as the job's status
+    """
+    __tablename__ = "post_deletions"
+    __table_args__ = (
+        Index("ix_post_deletions_due", "status", "leased_until"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: the post is gone once the job is done
+    post_id = Column(Integer, nullable=False, unique=True)
+    requested_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    status = Column(Enum(DeletionStatus), nullable=False, default=DeletionStatus.pending)
+    likes_deleted = Column(Integer, nullable=False, default=0)
+    comments_deleted = Column(Integer, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+    # A worker holds the job until then, renewed with every batch
+    leased_until = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<PostDeletion(id={self.id}, post_id={self.post_id}, status={self.status})>"
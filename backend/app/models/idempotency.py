@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, LargeBinary
+from app.db.session import Base
+from app.models.outbox import utcnow
+
+class IdempotencyKey(Base):
+    """A client-supplied Idempotency-Key and the response of its first attempt"""
+    __tablename__ = "idempotency_keys"
+
+    # Hash of the caller, route and key
+    id = Column(String(64), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    # Null while the first attempt is in flight
+    status_code = Column(Integer, nullable=True)
+    headers = Column(JSON, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<IdempotencyKey(id={self.id}, status_code={self.status_code})>"
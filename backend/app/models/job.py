@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, JSON
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+class JobState(Base):
+    """Small persisted state for background jobs, one row per job name"""
+    __tablename__ = "job_states"
+
+    name = Column(String, primary_key=True)
+    state = Column(JSON, nullable=False, default=dict)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<JobState(name={self.name})>"
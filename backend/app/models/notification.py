@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, JSON, UniqueConstraint, Index, PrimaryKeyConstraint
+from sqlalchemy.sql import func, text
 import enum
 from app.db.session import Base
 
@@ -16,17 +16,90 @@ class SeverityLevel(str, enum.Enum):
     medium = "medium"
     high = "high"
 
+class ActivityType(str, enum.Enum):
+    like = "like"
+    reply = "reply"
+    mention = "mention"
+
+def _not_postgresql(ddl, target, bind, dialect=None, **kw) -> bool:
+    return dialect.name != "postgresql"
+
 class Notification(Base):
+    """
+    Admin moderation notification. On PostgreSQL the table is range
+    partitioned by month on created_at (see app/services/notification_partitions.py),
+    which requires every unique constraint to include the partition key, so
+    the primary key on id alone is only created on other databases.
+    """
     __tablename__ = "notifications"
+    __table_args__ = (
+        PrimaryKeyConstraint("id", name="notifications_pkey").ddl_if(callable_=_not_postgresql),
+        UniqueConstraint("id", "created_at", name="uq_notifications_id_created_at").ddl_if(dialect="postgresql"),
+        Index("ix_notifications_created_at", "created_at"),
+        Index(
+            "ix_notifications_unread",
+            "created_at",
+            postgresql_where=text("is_read = false"),
+            sqlite_where=text("is_read = 0")
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, index=True, autoincrement=True)
     type = Column(Enum(NotificationType), nullable=False)
     severity = Column(Enum(SeverityLevel), nullable=False)
     content = Column(String, nullable=False)
     content_id = Column(Integer, nullable=False)
     content_type = Column(Enum(ContentType), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    is_read = Column(Boolean, default=False)
+
+    def __repr__(self):
+        return f"<Notification(id={self.id}, type={self.type}, severity={self.severity})>"
+
+class ActivityNotification(Base):
+    """
+    User-facing activity notification. Events on the same target within one
+    time bucket are aggregated into a single row ("alice and 240 others").
+    recent_actors holds the last ACTIVITY_RECENT_ACTORS distinct actors as
+    [id, username] pairs, newest last, so the row stays the same size however
+    many actors it counts.
+    """
+    __tablename__ = "activity_notifications"
+    __table_args__ = (
+        UniqueConstraint(
+            "recipient_id", "action", "target_type", "target_id", "bucket_start",
+            name="uq_activity_notifications_bucket"
+        ),
+        Index("ix_activity_notifications_recipient", "recipient_id", "updated_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    action = Column(Enum(ActivityType), nullable=False)
+    target_type = Column(Enum(ContentType), nullable=False)
+    target_id = Column(Integer, nullable=False)
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    actor_count = Column(Integer, nullable=False, default=1)
+    recent_actors = Column(JSON, nullable=False, default=list)
+    last_actor_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    last_actor_name = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=False)
     is_read = Column(Boolean, default=False)
 
+    @property
+    def message(self) -> str:
+        others = self.actor_count - 1
+        if others <= 0:
+            actors = self.last_actor_name
+        else:
+            actors = f"{self.last_actor_name} and {others} other{'s' if others > 1 else ''}"
+        target = ContentType(self.target_type).value
+        if self.action == ActivityType.mention:
+            return f"{actors} mentioned you in a {target}"
+        verb = "liked" if self.action == ActivityType.like else "replied to"
+        return f"{actors} {verb} your {target}"
+
     def __repr__(self):
-        return f"<Notification(id={self.id}, type={self.type}, severity={self.severity})>" 
\ No newline at end of file
+        return f"<ActivityNotification(id={self.id}, action={self.action}, actor_count={self.actor_count})>"
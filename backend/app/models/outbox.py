@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, DateTime, Enum, JSON, Index
+from sqlalchemy.sql import func
+import enum
+from app.db.session import Base
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+class OutboxChannel(str, enum.Enum):
+    websocket = "websocket"
+    email = "email"
+
+class OutboxStatus(str, enum.Enum):
+    pending = "pending"
+    sent = "sent"
+    failed = "failed"
+
+class OutboxMessage(Base):
+    """A notification delivery written in the same transaction as the notification"""
+    __tablename__ = "notification_outbox"
+    __table_args__ = (
+        Index("ix_notification_outbox_due", "status", "channel", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    # No foreign key: notifications is partitioned and old partitions are archived
+    notification_id = Column(Integer, nullable=True)
+    channel = Column(Enum(OutboxChannel), nullable=False)
+    # WebSocket deliveries are queued per admin and sent by whichever
+    # process that admin is connected to; email rows have no recipient
+    recipient_id = Column(Integer, nullable=True)
+    payload = Column(JSON, nullable=False)
+    status = Column(Enum(OutboxStatus), nullable=False, default=OutboxStatus.pending)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<OutboxMessage(id={self.id}, channel={self.channel}, status={self.status})>"
@@ -1,11 +1,26 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Enum, Float, Index, func, literal_column, text
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
 from app.db.session import Base
 from app.models.notification import SeverityLevel
 
 class Post(Base):
     __tablename__ = "posts"
+    # Full-text search index maintained by PostgreSQL; queries in
+    # app/services/search.py must use the same expression
+    __table_args__ = (
+        Index(
+            "ix_posts_content_fts",
+            func.to_tsvector(literal_column("'english'::regconfig"), literal_column("content")),
+            postgresql_using="gin"
+        ).ddl_if(dialect="postgresql"),
+        # Trending page: one scan over visible posts in score order
+        Index(
+            "ix_posts_trending",
+            text("hot_score DESC"),
+            postgresql_where=text("is_hidden = false AND hot_score > 0"),
+            sqlite_where=text("is_hidden = 0 AND hot_score > 0")
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(String, nullable=False)
@@ -18,9 +33,20 @@ class Post(Base):
     moderation_severity = Column(Enum(SeverityLevel), nullable=True)
     moderation_reason = Column(String, nullable=True)
     is_hidden = Column(Boolean, default=False)
+    # Raw classifier scores and the policy version that turned them into
+    # the verdict above, see app/services/moderation_policy.py
+    hate_score = Column(Float, nullable=True)
+    offensive_score = Column(Float, nullable=True)
+    moderation_policy_version = Column(Integer, nullable=True)
+
+    # Time-decayed engagement, see app/services/trending.py
+    hot_score = Column(Float, nullable=False, default=0.0, server_default="0")
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Set when the post is deleted; reads skip it from then on while a
+    # PostDeletion job removes its comments and likes in the background
+    deleted_at = Column(DateTime(timezone=True), nullable=True)
 
     # Relationships
     user = relationship("User", back_populates="posts")
@@ -35,4 +61,4 @@ class Post(Base):
 
     @property
     def comment_count(self) -> int:
-        return len(self.comments) 
\ No newline at end of file
+        return len(self.comments)
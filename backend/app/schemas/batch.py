@@ -0,0 +1,6 @@
+from typing import Literal
+from pydantic import BaseModel
+
+class BatchMiss(BaseModel):
+    id: int
+    reason: Literal["not_found", "hidden"]
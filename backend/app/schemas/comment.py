@@ -1,7 +1,8 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field
 from app.models.notification import SeverityLevel as ContentSeverity
+from app.schemas.user import AuthorSummary
 
 class CommentBase(BaseModel):
     content: str = Field(..., min_length=1, max_length=500)
@@ -31,5 +32,12 @@ class CommentResponse(CommentBase):
     like_count: int = 0
     reply_count: int = 0
 
+    # Null only if the author no longer exists
+    author: Optional[AuthorSummary] = None
+
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class CommentSearchResponse(BaseModel):
+    items: List[CommentResponse]
+    next_cursor: Optional[str] = None
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from datetime import datetime
 from typing import Optional
-from app.models.notification import NotificationType, ContentType, SeverityLevel
+from app.models.notification import NotificationType, ContentType, SeverityLevel, ActivityType
 
 class NotificationBase(BaseModel):
     type: NotificationType
@@ -19,4 +19,19 @@ class NotificationResponse(NotificationBase):
     is_read: bool
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class ActivityNotificationResponse(BaseModel):
+    id: int
+    action: ActivityType
+    target_type: ContentType
+    target_id: int
+    actor_count: int
+    last_actor_id: int
+    last_actor_name: str
+    message: str
+    updated_at: datetime
+    is_read: bool
+
+    class Config:
+        from_attributes = True
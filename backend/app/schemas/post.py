@@ -1,7 +1,10 @@
 from datetime import datetime
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import List, Optional
+from pydantic import AliasChoices, BaseModel, Field
+from app.models.deletion import DeletionStatus
 from app.models.notification import SeverityLevel as ContentSeverity
+from app.schemas.batch import BatchMiss
+from app.schemas.user import AuthorSummary
 
 class PostBase(BaseModel):
     content: str = Field(..., min_length=1, max_length=500)
@@ -14,9 +17,9 @@ class PostUpdate(PostBase):
 
 class PostResponse(PostBase):
     id: int
-    author_id: int
+    author_id: int = Field(validation_alias=AliasChoices("author_id", "user_id"))
     created_at: datetime
-    updated_at: datetime
+    updated_at: Optional[datetime] = None
     
     # Moderation fields
     is_moderated: bool
@@ -29,6 +32,32 @@ class PostResponse(PostBase):
     like_count: int = 0
     comment_count: int = 0
 
+    # Null only if the author no longer exists
+    author: Optional[AuthorSummary] = None
+
+    class Config:
+        from_attributes = True
+
+class PostSearchResponse(BaseModel):
+    items: List[PostResponse]
+    next_cursor: Optional[str] = None
+
+class PostBatchResponse(BaseModel):
+    # One entry per requested id, in request order; null where listed in missing
+    items: List[Optional[PostResponse]]
+    missing: List[BatchMiss]
+
+class PostDeletionResponse(BaseModel):
+    id: int
+    post_id: int
+    status: DeletionStatus
+    likes_deleted: int
+    comments_deleted: int
+    attempts: int
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
     class Config:
         from_attributes = True
 
@@ -39,14 +68,16 @@ class PostWithWarning(PostResponse):
     def from_post(cls, post: PostResponse) -> "PostWithWarning":
         warning = None
         if post.is_negative:
-            if post.moderation_severity == ContentSeverity.LOW:
+            if post.moderation_severity == ContentSeverity.low:
                 warning = "This post may contain inappropriate content"
-            elif post.moderation_severity == ContentSeverity.MEDIUM:
+            elif post.moderation_severity == ContentSeverity.medium:
                 warning = "This post contains potentially offensive content"
-            elif post.moderation_severity == ContentSeverity.HIGH:
+            elif post.moderation_severity == ContentSeverity.high:
                 warning = "This post has been hidden due to violation of community guidelines"
         
-        return cls(
-            **post.dict(),
+        # Fields are already validated, so skip a second validation pass
+        return cls.model_construct(
+            _fields_set=post.model_fields_set | {"warning_message"},
+            **dict(post),
             warning_message=warning
         ) 
\ No newline at end of file
@@ -0,0 +1,5 @@
+from pydantic import BaseModel
+
+class TrendingTag(BaseModel):
+    tag: str
+    count: int
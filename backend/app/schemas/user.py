@@ -1,6 +1,7 @@
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from pydantic import BaseModel, EmailStr, Field
+from app.schemas.batch import BatchMiss
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -23,4 +24,19 @@ class UserResponse(UserBase):
     updated_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class AuthorSummary(BaseModel):
+    # Embedded in post and comment responses, filled by AuthorLoader
+    id: int
+    username: str
+    full_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class UserBatchResponse(BaseModel):
+    # One entry per requested id, in request order; null where listed in missing
+    items: List[Optional[UserResponse]]
+    missing: List[BatchMiss]
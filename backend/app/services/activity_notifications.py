@@ -0,0 +1,157 @@
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import dialect_insert
+from app.models.notification import ActivityNotification, ActivityType, ContentType
+from app.models.user import User
+from app.websocket import manager
+
+def bucket_start(now: datetime) -> datetime:
+    """Start of the aggregation window containing ``now``"""
+    window = settings.ACTIVITY_NOTIFICATION_WINDOW
+    return datetime.fromtimestamp(int(now.timestamp()) // window * window, tz=timezone.utc)
+
+def _merge_actor(recent: List[List], actor: User) -> Tuple[List[List], bool]:
+    """Move ``actor`` to the newest end of ``recent``; also whether they weren't in it yet"""
+    others = [entry for entry in recent if entry[0] != actor.id]
+    merged = (others + [[actor.id, actor.username]])[-settings.ACTIVITY_RECENT_ACTORS:]
+    return merged, len(others) == len(recent)
+
+def record_activity(
+    db: Session,
+    recipient_id: int,
+    actor: User,
+    action: ActivityType,
+    target_type: ContentType,
+    target_id: int
+) -> Optional[ActivityNotification]:
+    """
+    Fold one like/reply into the recipient's notification for this target and
+    time window: the first event inserts the row, later ones lock and update
+    it, so a burst writes one row whatever its size. The actor is counted
+    unless they are among the notification's recent actors already, which
+    keeps like/unlike/like or several replies from counting twice; only an
+    actor returning after ACTIVITY_RECENT_ACTORS others is counted again.
+    Returns None for self-activity. The caller commits.
+    """
+    if recipient_id == actor.id:
+        return None
+
+    now = datetime.now(timezone.utc)
+    key = {
+        "recipient_id": recipient_id,
+        "action": action,
+        "target_type": target_type,
+        "target_id": target_id,
+        "bucket_start": bucket_start(now),
+    }
+    current = select(
+        ActivityNotification.id, ActivityNotification.actor_count, ActivityNotification.recent_actors
+    ).filter_by(**key).with_for_update()
+
+    row = db.execute(current).first()
+    if row is None:
+        notification_id = db.execute(
+            dialect_insert(db, ActivityNotification)
+            .values(
+                **key,
+                actor_count=1,
+                recent_actors=[[actor.id, actor.username]],
+                last_actor_id=actor.id,
+                last_actor_name=actor.username,
+                updated_at=now,
+                is_read=False
+            )
+            .on_conflict_do_nothing(index_elements=list(key))
+            .returning(ActivityNotification.id)
+        ).scalar_one_or_none()
+        if notification_id is not None:
+            return ActivityNotification(
+                id=notification_id, **key, actor_count=1, last_actor_id=actor.id,
+                last_actor_name=actor.username, updated_at=now, is_read=False
+            )
+        # Another request inserted the bucket's first event meanwhile
+        row = db.execute(current).one()
+
+    recent, is_new = _merge_actor(row.recent_actors, actor)
+    actor_count = row.actor_count + is_new
+    db.execute(
+        update(ActivityNotification)
+        .where(ActivityNotification.id == row.id)
+        .values(
+            actor_count=actor_count,
+            recent_actors=recent,
+            last_actor_id=actor.id,
+            last_actor_name=actor.username,
+            updated_at=now,
+            is_read=False
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return ActivityNotification(
+        id=row.id, **key, actor_count=actor_count, last_actor_id=actor.id,
+        last_actor_name=actor.username, updated_at=now, is_read=False
+    )
+
+def retract_activity(
+    db: Session,
+    recipient_id: int,
+    actor: User,
+    action: ActivityType,
+    target_type: ContentType,
+    target_id: int
+):
+    """
+    Take an actor back out of the recipient's notifications for this target
+    (an unlike) where they are among the recent actors: the count drops, the
+    last actor falls back to the newest remaining one, and a notification
+    left without a recent actor to name is removed. The caller commits.
+    """
+    rows = db.execute(
+        select(ActivityNotification.id, ActivityNotification.actor_count, ActivityNotification.recent_actors)
+        .where(
+            ActivityNotification.recipient_id == recipient_id,
+            ActivityNotification.action == action,
+            ActivityNotification.target_type == target_type,
+            ActivityNotification.target_id == target_id
+        )
+        .with_for_update()
+    ).all()
+    for row in rows:
+        recent = [entry for entry in row.recent_actors if entry[0] != actor.id]
+        if len(recent) == len(row.recent_actors):
+            continue
+        if not recent:
+            db.execute(delete(ActivityNotification).where(ActivityNotification.id == row.id))
+            continue
+        db.execute(
+            update(ActivityNotification)
+            .where(ActivityNotification.id == row.id)
+            .values(
+                actor_count=row.actor_count - 1,
+                recent_actors=recent,
+                last_actor_id=recent[-1][0],
+                last_actor_name=recent[-1][1]
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+async def push_activity(notification: Optional[ActivityNotification]):
+    """Send the aggregated notification to the recipient's live connections"""
+    if notification is None:
+        return
+    await manager.send_personal_message({
+        "type": "activity",
+        "data": {
+            "id": notification.id,
+            "action": ActivityType(notification.action).value,
+            "targetType": ContentType(notification.target_type).value,
+            "targetId": notification.target_id,
+            "actorCount": notification.actor_count,
+            "lastActorId": notification.last_actor_id,
+            "message": notification.message,
+            "updatedAt": notification.updated_at.isoformat(),
+        }
+    }, notification.recipient_id)
@@ -1,13 +1,84 @@
+import asyncio
+import time
 import requests
-from typing import Dict, Optional, Tuple
+from requests.adapters import HTTPAdapter
+from typing import Dict, List, Optional, Tuple, Union
 from app.core.config import settings
-from app.models.notification import SeverityLevel as ContentSeverity
+from app.core.metrics import MODERATION_LATENCY
+from app.services.moderation_policy import HIDDEN_SEVERITIES, current_policy
 
 class AIModeration:
     def __init__(self):
         self.api_token = settings.HUGGING_FACE_API_TOKEN
-        self.api_url = "https://api-inference.huggingface.co/models/facebook/roberta-hate-speech-dynabench-r4-target"
+        self.api_url = settings.MODERATION_API_URL
         self.headers = {"Authorization": f"Bearer {self.api_token}"}
+        # Created on first use; keeps connections (and TLS sessions) alive between calls
+        self._session: Optional[requests.Session] = None
+        # Outcome of the most recent call, reported by /ready
+        self.last_outcome: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=settings.MODERATION_MAX_CONNECTIONS)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(self.headers)
+            self._session = session
+        return self._session
+
+    def _classify(self, inputs: Union[str, List[str]]) -> list:
+        """Call the inference API; a list of inputs returns one score list per input"""
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            response = self.session.post(
+                self.api_url,
+                json={"inputs": inputs},
+                timeout=settings.MODERATION_TIMEOUT
+            )
+            response.raise_for_status()
+            result = response.json()
+            if not isinstance(result, list):
+                raise ValueError(f"Unexpected moderation response: {result}")
+            outcome = "ok"
+            self.last_error = None
+            return result
+        except Exception as e:
+            self.last_error = str(e)
+            raise
+        finally:
+            self.last_outcome = outcome
+            MODERATION_LATENCY.labels(outcome).observe(time.perf_counter() - started)
+
+    def warm(self) -> bool:
+        """
+        Open a connection to the inference API ahead of the first request.
+        Any HTTP response counts as reachable; the model may still be loading.
+        """
+        try:
+            self.session.get(self.api_url, timeout=settings.MODERATION_TIMEOUT).close()
+        except requests.RequestException as e:
+            self.last_outcome, self.last_error = "unreachable", str(e)
+            return False
+        if self.last_outcome is None:
+            self.last_outcome = "reachable"
+        return True
+
+    def _verdict(self, result: list) -> Dict:
+        scores = self._scores(result)
+        if scores is None:
+            severity, reason = None, None
+        else:
+            severity, reason = current_policy().classify(*scores)
+        return {
+            "is_negative": severity is not None,
+            "severity": severity,
+            "reason": reason,
+            "scores": scores
+        }
 
     async def analyze_content(self, content: str) -> Dict:
         """
@@ -15,50 +86,55 @@ class AIModeration:
         Returns a dict with moderation results
         """
         try:
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                json={"inputs": content}
-            )
-            result = response.json()
+            result = await asyncio.to_thread(self._classify, content)
 
             # Process the response and determine severity
-            severity, reason = self._process_response(result)
-
-            return {
-                "is_negative": severity is not None,
-                "severity": severity,
-                "reason": reason
-            }
+            return self._verdict(result)
         except Exception as e:
             print(f"Error in content moderation: {str(e)}")
             return {
                 "is_negative": False,
                 "severity": None,
-                "reason": "Error in content moderation"
+                "reason": "Error in content moderation",
+                "scores": None
             }
 
-    def _process_response(self, result: list) -> Tuple[Optional[ContentSeverity], Optional[str]]:
+    async def analyze_batch(self, contents: List[str]) -> List[Dict]:
         """
-        Process the Hugging Face API response and determine content severity
+        Analyze several texts in one API call. Unlike analyze_content, errors
+        are raised so bulk callers can retry instead of recording a clean verdict.
+        """
+        result = await asyncio.to_thread(self._classify, contents)
+        if len(result) != len(contents):
+            raise ValueError(f"Expected {len(contents)} moderation results, got {len(result)}")
+        return [self._verdict([scores]) for scores in result]
+
+    def _scores(self, result: list) -> Optional[Tuple[float, float]]:
+        """
+        Extract the (hate, offensive) scores from the Hugging Face API response
         """
         try:
-            # Get the highest probability classification
             scores = result[0]
             hate_score = next((item['score'] for item in scores if item['label'] == 'hate'), 0)
             offensive_score = next((item['score'] for item in scores if item['label'] == 'offensive'), 0)
-
-            if hate_score > 0.7:
-                return ContentSeverity.HIGH, "Content contains hate speech"
-            elif hate_score > 0.4 or offensive_score > 0.7:
-                return ContentSeverity.MEDIUM, "Content may be offensive"
-            elif offensive_score > 0.4:
-                return ContentSeverity.LOW, "Content may be inappropriate"
-            else:
-                return None, None
+            return hate_score, offensive_score
 
         except Exception as e:
             print(f"Error processing moderation response: {str(e)}")
-            return None, None
+            return None
+
+def moderation_columns(result: Dict) -> Dict:
+    """Column values for a post or comment from an analyze_content result"""
+    scores = result["scores"]
+    return {
+        "is_moderated": True,
+        "is_negative": result["is_negative"],
+        "moderation_severity": result["severity"],
+        "moderation_reason": result["reason"],
+        "is_hidden": result["severity"] in HIDDEN_SEVERITIES,
+        "hate_score": scores[0] if scores else None,
+        "offensive_score": scores[1] if scores else None,
+        "moderation_policy_version": settings.MODERATION_POLICY_VERSION if scores else None
+    }
 
-ai_moderator = AIModeration() 
\ No newline at end of file
+ai_moderator = AIModeration()
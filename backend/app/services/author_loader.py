@@ -0,0 +1,119 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Type
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.user import AuthorSummary
+
+SUMMARY_FIELDS = tuple(AuthorSummary.model_fields)
+SUMMARY_COLUMNS = [getattr(User, name) for name in SUMMARY_FIELDS]
+
+def summary_of(user: User) -> Dict[str, Any]:
+    return {name: getattr(user, name) for name in SUMMARY_FIELDS}
+
+def _author_id(item: Dict[str, Any]) -> int:
+    # Posts say author_id, comments user_id
+    return item["author_id"] if "author_id" in item else item["user_id"]
+
+class AuthorCache:
+    """
+    Author summaries shared by all requests of this process. Entries
+    expire after AUTHOR_CACHE_TTL and the least recently stored are
+    evicted beyond AUTHOR_CACHE_MAX_ENTRIES. A user's own profile update
+    invalidates their entry here; other processes catch up within the TTL.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, ids: Iterable[int], now: Optional[float] = None) -> Tuple[Dict[int, Dict[str, Any]], List[int]]:
+        """Cached summaries by id, and the ids that have to be fetched"""
+        now = time.monotonic() if now is None else now
+        found, missing = {}, []
+        with self._lock:
+            for user_id in ids:
+                entry = self._entries.get(user_id)
+                if entry is not None and entry[0] > now:
+                    found[user_id] = entry[1]
+                else:
+                    missing.append(user_id)
+        return found, missing
+
+    def put_many(self, summaries: Dict[int, Dict[str, Any]], now: Optional[float] = None):
+        expires = (time.monotonic() if now is None else now) + settings.AUTHOR_CACHE_TTL
+        with self._lock:
+            for user_id, summary in summaries.items():
+                self._entries.pop(user_id, None)
+                self._entries[user_id] = (expires, summary)
+            while len(self._entries) > settings.AUTHOR_CACHE_MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+author_cache = AuthorCache()
+
+class AuthorLoader:
+    """
+    Request-scoped loader of the author summaries embedded in post and
+    comment responses. Ids of a whole page are collected first and
+    resolved together: from what this request already loaded, then the
+    process cache, then one query for the rest. A page therefore costs at
+    most one extra query however many items or authors it has, and never
+    lazy-loads ``post.user`` per item.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._loaded: Dict[int, Optional[Dict[str, Any]]] = {}
+
+    def prime(self, user: User):
+        """Make a user already in hand (usually the current user) loadable without a query"""
+        self._loaded[user.id] = summary_of(user)
+
+    def load_many(self, ids: Iterable[int]) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Summaries by id; None for users that don't exist"""
+        ids = list(dict.fromkeys(ids))
+        wanted = [user_id for user_id in ids if user_id not in self._loaded]
+        if wanted:
+            cached, wanted = author_cache.get_many(wanted)
+            self._loaded.update(cached)
+        if wanted:
+            fetched = {
+                row.id: dict(zip(SUMMARY_FIELDS, row))
+                for row in self.db.execute(select(*SUMMARY_COLUMNS).where(User.id.in_(wanted)))
+            }
+            author_cache.put_many(fetched)
+            self._loaded.update(fetched)
+            for user_id in wanted:
+                self._loaded.setdefault(user_id, None)
+        return {user_id: self._loaded[user_id] for user_id in ids}
+
+    def attach(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Set ``author`` on serialized posts or comments, in place"""
+        summaries = self.load_many(_author_id(item) for item in items)
+        for item in items:
+            item["author"] = summaries[_author_id(item)]
+        return items
+
+    def embedded(self, ids: Iterable[int]) -> List[Optional[Dict[str, Any]]]:
+        """Summaries of ``ids`` in order, for folding into an ETag"""
+        summaries = self.load_many(ids)
+        return list(summaries.values())
+
+    def response(self, schema: Type[BaseModel], obj: Any) -> BaseModel:
+        """Response model for an ORM post or comment, with its author"""
+        response = schema.model_validate(obj)
+        author_id = _author_id(response.__dict__)
+        summary = self.load_many([author_id])[author_id]
+        response.author = AuthorSummary(**summary) if summary is not None else None
+        return response
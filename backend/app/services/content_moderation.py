@@ -1,15 +1,14 @@
-import os
 from typing import Dict, Any
 import requests
 from fastapi import HTTPException
+from app.core.config import settings
 
 class ContentModerationService:
     def __init__(self):
-        self.api_token = os.getenv("HUGGING_FACE_API_TOKEN")
-        if not self.api_token:
-            raise ValueError("HUGGING_FACE_API_TOKEN environment variable is not set")
-        
-        self.api_url = "https://api-inference.huggingface.co/models/facebook/roberta-hate-speech-dynabench-r4-target"
+        # The token is checked when content is first checked, so importing
+        # this module never fails
+        self.api_token = settings.HUGGING_FACE_API_TOKEN
+        self.api_url = settings.MODERATION_API_URL
         self.headers = {"Authorization": f"Bearer {self.api_token}"}
 
     async def check_content(self, text: str) -> Dict[str, Any]:
@@ -17,6 +16,8 @@ class ContentModerationService:
         Check if content contains inappropriate material.
         Returns a dictionary with toxicity scores and classification.
         """
+        if not self.api_token:
+            raise ValueError("HUGGING_FACE_API_TOKEN environment variable is not set")
         try:
             response = requests.post(
                 self.api_url,
@@ -0,0 +1,103 @@
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+from sqlalchemy import case, cast, null, or_, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+from app.core.config import settings
+from app.models.comment import Comment
+from app.models.notification import SeverityLevel
+from app.models.post import Post
+
+HIDDEN_SEVERITIES = (SeverityLevel.medium, SeverityLevel.high)
+REASONS = {
+    SeverityLevel.high: "Content contains hate speech",
+    SeverityLevel.medium: "Content may be offensive",
+    SeverityLevel.low: "Content may be inappropriate"
+}
+
+@dataclass(frozen=True)
+class ModerationPolicy:
+    """
+    Thresholds that turn classifier scores into a verdict. The same rules
+    are available in Python (for new content) and as SQL expressions (for
+    re-deriving stored verdicts without calling the model).
+    """
+    version: int
+    hate_high: float
+    hate_medium: float
+    offensive_medium: float
+    offensive_low: float
+
+    def classify(self, hate: float, offensive: float) -> Tuple[Optional[SeverityLevel], Optional[str]]:
+        if hate > self.hate_high:
+            severity = SeverityLevel.high
+        elif hate > self.hate_medium or offensive > self.offensive_medium:
+            severity = SeverityLevel.medium
+        elif offensive > self.offensive_low:
+            severity = SeverityLevel.low
+        else:
+            return None, None
+        return severity, REASONS[severity]
+
+    def _case(self, hate: ColumnElement, offensive: ColumnElement, results: Callable, else_=None) -> ColumnElement:
+        return case(
+            (hate > self.hate_high, results(SeverityLevel.high)),
+            ((hate > self.hate_medium) | (offensive > self.offensive_medium), results(SeverityLevel.medium)),
+            (offensive > self.offensive_low, results(SeverityLevel.low)),
+            else_=null() if else_ is None else else_
+        )
+
+    def severity_expression(self, hate: ColumnElement, offensive: ColumnElement) -> ColumnElement:
+        # Enum names as strings; callers cast to the column's enum type
+        return self._case(hate, offensive, lambda severity: severity.name)
+
+    def reason_expression(self, hate: ColumnElement, offensive: ColumnElement) -> ColumnElement:
+        return self._case(hate, offensive, REASONS.get)
+
+    def negative_expression(self, hate: ColumnElement, offensive: ColumnElement) -> ColumnElement:
+        return self._case(hate, offensive, lambda severity: True, else_=False)
+
+    def hidden_expression(self, hate: ColumnElement, offensive: ColumnElement) -> ColumnElement:
+        return self._case(hate, offensive, lambda severity: severity in HIDDEN_SEVERITIES, else_=False)
+
+def rederive_verdicts(db: Session, policy: Optional[ModerationPolicy] = None) -> Dict[str, int]:
+    """
+    Re-apply thresholds to the stored scores of all posts and comments with
+    one UPDATE per table; no inference. Content without scores is left for
+    the re-moderation job, and rows whose verdict and policy version are
+    already current are not touched. Returns rows updated per table. The
+    caller commits.
+    """
+    policy = policy or current_policy()
+    counts = {}
+    for name, model in (("posts", Post), ("comments", Comment)):
+        hate, offensive = model.hate_score, model.offensive_score
+        verdict = {
+            "moderation_severity": cast(
+                policy.severity_expression(hate, offensive), model.moderation_severity.type
+            ),
+            "moderation_reason": policy.reason_expression(hate, offensive),
+            "is_negative": policy.negative_expression(hate, offensive),
+            "is_hidden": policy.hidden_expression(hate, offensive),
+            "moderation_policy_version": policy.version
+        }
+        # Only rows whose verdict or policy version actually changes
+        changed = or_(*(getattr(model, column).is_distinct_from(value) for column, value in verdict.items()))
+        result = db.execute(
+            update(model)
+            .where(hate.is_not(None), offensive.is_not(None), changed)
+            # A new verdict isn't an edit: keep updated_at (and the ETag) as is
+            .values(**verdict, updated_at=model.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        counts[name] = result.rowcount
+    return counts
+
+def current_policy() -> ModerationPolicy:
+    return ModerationPolicy(
+        version=settings.MODERATION_POLICY_VERSION,
+        hate_high=settings.MODERATION_HATE_HIGH,
+        hate_medium=settings.MODERATION_HATE_MEDIUM,
+        offensive_medium=settings.MODERATION_OFFENSIVE_MEDIUM,
+        offensive_low=settings.MODERATION_OFFENSIVE_LOW
+    )
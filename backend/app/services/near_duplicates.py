@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Dict, List, NamedTuple, Optional, Set
+import numpy as np
+from app.core.config import settings
+from app.services.moderation_policy import HIDDEN_SEVERITIES
+
+SHINGLE = 4
+PERMUTATIONS = 64
+BANDS = 16
+ROWS = PERMUTATIONS // BANDS
+_PRIME = np.uint64((1 << 61) - 1)
+# Fixed seed: signatures must agree across processes and restarts
+_rng = np.random.default_rng(20240201)
+_A = _rng.integers(1, 1 << 32, PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 32, PERMUTATIONS, dtype=np.uint64)
+
+def minhash(content: str) -> Optional[np.ndarray]:
+    """
+    MinHash signature over character shingles of the normalized text; the
+    share of equal positions estimates Jaccard similarity. None for content
+    too short to fingerprint.
+    """
+    text = " ".join(content.lower().split())
+    if len(text) < settings.NEAR_DUPLICATE_MIN_LENGTH:
+        return None
+    shingles = {text[i:i + SHINGLE] for i in range(len(text) - SHINGLE + 1)}
+    digests = b"".join(blake2b(shingle.encode(), digest_size=4).digest() for shingle in shingles)
+    hashes = np.frombuffer(digests, dtype=np.uint32).astype(np.uint64)
+    # 32-bit operands keep a * x + b inside uint64
+    permuted = (np.outer(hashes, _A) + _B) % _PRIME
+    return (permuted & np.uint64(0xFFFFFFFF)).min(axis=0).astype(np.uint32)
+
+def _band_keys(signature: np.ndarray) -> List[bytes]:
+    return [signature[band * ROWS:(band + 1) * ROWS].tobytes() for band in range(BANDS)]
+
+class _Entry(NamedTuple):
+    signature: np.ndarray
+    user_id: int
+    created: float
+    verdict: Dict
+
+class DuplicateCheck(NamedTuple):
+    signature: Optional[np.ndarray]
+    # Moderation result of a hidden near-duplicate, reusable as-is
+    verdict: Optional[Dict]
+    # Near-duplicates the same user posted within the window
+    user_copies: int
+
+class NearDuplicateIndex:
+    """
+    MinHash signatures of recent content with LSH banding: signatures are
+    split into BANDS buckets of ROWS values and only entries sharing a
+    bucket are compared, so lookups stay cheap however large the index.
+    Entries expire after NEAR_DUPLICATE_WINDOW and the oldest are evicted
+    beyond NEAR_DUPLICATE_MAX_ENTRIES. The index is per process.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._bands: List[Dict[bytes, Set[int]]] = [{} for _ in range(BANDS)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def check(self, content: str, user_id: int, now: Optional[float] = None) -> DuplicateCheck:
+        signature = minhash(content)
+        if signature is None:
+            return DuplicateCheck(None, None, 0)
+        now = time.time() if now is None else now
+        with self._lock:
+            self._evict(now)
+            candidates = set()
+            for buckets, key in zip(self._bands, _band_keys(signature)):
+                candidates.update(buckets.get(key, ()))
+            matches = [
+                entry for entry in map(self._entries.__getitem__, candidates)
+                if np.count_nonzero(entry.signature == signature) >= settings.NEAR_DUPLICATE_SIMILARITY * PERMUTATIONS
+            ]
+        verdict = next((entry.verdict for entry in matches if entry.verdict["severity"] in HIDDEN_SEVERITIES), None)
+        return DuplicateCheck(signature, verdict, sum(entry.user_id == user_id for entry in matches))
+
+    def add(self, signature: Optional[np.ndarray], user_id: int, verdict: Dict, now: Optional[float] = None):
+        if signature is None:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = _Entry(signature, user_id, now, verdict)
+            for buckets, key in zip(self._bands, _band_keys(signature)):
+                buckets.setdefault(key, set()).add(entry_id)
+            self._evict(now)
+
+    def _evict(self, now: float):
+        horizon = now - settings.NEAR_DUPLICATE_WINDOW
+        while self._entries:
+            entry_id, entry = next(iter(self._entries.items()))
+            if entry.created > horizon and len(self._entries) <= settings.NEAR_DUPLICATE_MAX_ENTRIES:
+                return
+            del self._entries[entry_id]
+            for buckets, key in zip(self._bands, _band_keys(entry.signature)):
+                bucket = buckets[key]
+                bucket.discard(entry_id)
+                if not bucket:
+                    del buckets[key]
+
+near_duplicates = NearDuplicateIndex()
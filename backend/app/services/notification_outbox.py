@@ -0,0 +1,218 @@
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.email import email_enabled, send_moderation_digest
+from app.db.session import SessionLocal
+from app.models.notification import Notification, NotificationType, ContentType, SeverityLevel
+from app.models.outbox import OutboxMessage, OutboxChannel, OutboxStatus
+from app.models.user import User
+from app.websocket import manager, notify_content_moderated
+
+def create_moderation_notification(
+    db: Session,
+    content_type: ContentType,
+    content_id: int,
+    severity: SeverityLevel,
+    content: str
+) -> Notification:
+    """
+    Add a moderation notification and its queued deliveries to the caller's
+    transaction; the caller commits them together with the content, so a
+    failure either loses both or neither. Delivery is left to the
+    dispatcher, so callers never wait on WebSocket or email sinks.
+    """
+    notification = Notification(
+        type=NotificationType.moderation,
+        severity=severity,
+        content=content,
+        content_id=content_id,
+        content_type=content_type
+    )
+    db.add(notification)
+    db.flush()
+
+    payload = {
+        "id": notification.id,
+        "type": NotificationType.moderation.value,
+        "severity": SeverityLevel(severity).value,
+        "content": content,
+        "contentId": content_id,
+        "contentType": ContentType(content_type).value,
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "isRead": False
+    }
+    # One WebSocket delivery per admin, so each is sent by the process
+    # that admin is connected to
+    admin_ids = db.query(User.id).filter(User.is_superuser == True, User.is_active == True)
+    db.add_all(
+        OutboxMessage(
+            notification_id=notification.id,
+            channel=OutboxChannel.websocket,
+            recipient_id=admin_id,
+            payload=payload
+        )
+        for (admin_id,) in admin_ids
+    )
+    # High severity violations are also emailed, collected into digests
+    if severity == SeverityLevel.high and email_enabled():
+        db.add(OutboxMessage(
+            notification_id=notification.id,
+            channel=OutboxChannel.email,
+            payload=payload
+        ))
+
+    return notification
+
+class NotificationDispatcher:
+    """Background worker delivering outbox rows in batches"""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                delivered = await self.dispatch_once()
+            except Exception as e:
+                print(f"Error in notification dispatcher: {str(e)}")
+                delivered = 0
+            # Keep draining while batches come back full
+            if delivered < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+    async def dispatch_once(self) -> int:
+        """Deliver one batch per channel and return the number of rows handled"""
+        db = SessionLocal()
+        try:
+            delivered = await self._dispatch_websocket(db)
+            delivered += await self._dispatch_email_digest(db)
+            return delivered
+        finally:
+            db.close()
+
+    def _due(
+        self,
+        db: Session,
+        channel: OutboxChannel,
+        now: datetime,
+        recipients: Optional[List[int]] = None
+    ) -> List[OutboxMessage]:
+        # SKIP LOCKED lets several workers drain the outbox without double delivery
+        query = db.query(OutboxMessage).filter(
+            OutboxMessage.status == OutboxStatus.pending,
+            OutboxMessage.channel == channel,
+            OutboxMessage.next_attempt_at <= now
+        )
+        if recipients is not None:
+            query = query.filter(OutboxMessage.recipient_id.in_(recipients))
+        return (
+            query
+            .order_by(OutboxMessage.id)
+            .limit(settings.OUTBOX_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+
+    def _retry(self, row: OutboxMessage, error: Exception, now: datetime):
+        """Schedule another attempt with exponential backoff, or give up"""
+        row.attempts += 1
+        row.last_error = str(error)[:500]
+        if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            row.status = OutboxStatus.failed
+        else:
+            delay = min(
+                settings.OUTBOX_RETRY_BASE * 2 ** (row.attempts - 1),
+                settings.OUTBOX_RETRY_MAX
+            )
+            row.next_attempt_at = now + timedelta(seconds=delay)
+
+    def _mark_sent(self, row: OutboxMessage, now: datetime):
+        row.status = OutboxStatus.sent
+        row.attempts += 1
+        row.sent_at = now
+
+    async def _dispatch_websocket(self, db: Session) -> int:
+        now = datetime.now(timezone.utc)
+        self._expire_websocket(db, now)
+
+        # Only alerts for admins connected to this process; the rest stay
+        # pending for the process their admin is (or will be) connected to
+        online = manager.online_users()
+        rows = self._due(db, OutboxChannel.websocket, now, recipients=online) if online else []
+        if not rows:
+            db.commit()
+            return 0
+
+        delivered = 0
+        for row in rows:
+            try:
+                # Left pending if the admin disconnected meanwhile
+                if await notify_content_moderated(row.payload, row.recipient_id):
+                    self._mark_sent(row, now)
+                    delivered += 1
+            except Exception as e:
+                self._retry(row, e, now)
+        db.commit()
+        return delivered
+
+    def _expire_websocket(self, db: Session, now: datetime):
+        """Give up on alerts whose admin hasn't connected within OUTBOX_WEBSOCKET_TTL"""
+        db.execute(
+            update(OutboxMessage)
+            .where(
+                OutboxMessage.status == OutboxStatus.pending,
+                OutboxMessage.channel == OutboxChannel.websocket,
+                OutboxMessage.created_at < now - timedelta(seconds=settings.OUTBOX_WEBSOCKET_TTL)
+            )
+            .values(status=OutboxStatus.failed, last_error="expired: recipient never connected")
+            .execution_options(synchronize_session=False)
+        )
+
+    async def _dispatch_email_digest(self, db: Session) -> int:
+        if not email_enabled():
+            return 0
+        now = datetime.now(timezone.utc)
+
+        # Wait until the oldest alert has collected a full digest window
+        cutoff = now - timedelta(seconds=settings.MODERATION_DIGEST_INTERVAL)
+        ready = db.query(OutboxMessage.id).filter(
+            OutboxMessage.status == OutboxStatus.pending,
+            OutboxMessage.channel == OutboxChannel.email,
+            OutboxMessage.next_attempt_at <= now,
+            OutboxMessage.created_at <= cutoff
+        ).first()
+        if ready is None:
+            db.rollback()
+            return 0
+
+        rows = self._due(db, OutboxChannel.email, now)
+        try:
+            await asyncio.to_thread(
+                send_moderation_digest,
+                settings.ADMIN_EMAILS,
+                [row.payload for row in rows]
+            )
+            for row in rows:
+                self._mark_sent(row, now)
+        except Exception as e:
+            for row in rows:
+                self._retry(row, e, now)
+        db.commit()
+        return len(rows)
+
+notification_dispatcher = NotificationDispatcher()
@@ -0,0 +1,201 @@
+import asyncio
+import gzip
+import json
+import os
+import re
+from contextlib import suppress
+from datetime import date, datetime, timezone
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.core.config import settings
+from app.db.session import SessionLocal, engine
+from app.models.notification import Notification
+
+PARTITION_NAME = re.compile(r"^notifications_y(\d{4})m(\d{2})$")
+
+def month_start(day: date, offset: int = 0) -> date:
+    """First day of the month ``offset`` months away from ``day``"""
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"notifications_y{month:%Y}m{month:%m}"
+
+def retained_since(today: Optional[date] = None) -> datetime:
+    """
+    Oldest created_at still kept. Queries over all notifications filter on it
+    so PostgreSQL prunes them to the retained monthly partitions.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = month_start(today, -settings.NOTIFICATION_RETENTION_MONTHS)
+    return datetime(cutoff.year, cutoff.month, 1, tzinfo=timezone.utc)
+
+def _expired(names: List[str], cutoff: date) -> List[str]:
+    return [
+        name for name in names
+        if (match := PARTITION_NAME.match(name))
+        and month_start(date(int(match[1]), int(match[2]), 1), 1) <= cutoff
+    ]
+
+class NotificationPartitionManager:
+    """
+    Keeps the notifications table bounded: creates monthly partitions ahead of
+    time and archives partitions older than the retention period to gzip files
+    in NOTIFICATION_ARCHIVE_DIR. Databases without declarative partitioning
+    (SQLite in development) archive and delete old rows instead.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.NOTIFICATION_MAINTENANCE_INTERVAL)
+            await self.maintain_safely()
+
+    async def maintain_safely(self):
+        try:
+            await asyncio.to_thread(self.maintain)
+        except Exception as e:
+            print(f"Error in notification partition maintenance: {str(e)}")
+
+    def maintain(self, today: Optional[date] = None) -> Dict[str, List[str]]:
+        today = today or datetime.now(timezone.utc).date()
+        if engine.dialect.name != "postgresql":
+            return {"created": [], "archived": self._archive_rows(today)}
+
+        with engine.begin() as conn:
+            if not self._is_partitioned(conn):
+                print("notifications is not a partitioned table, skipping partition maintenance")
+                return {"created": [], "archived": []}
+            created = self.ensure_partitions(conn, today)
+        return {"created": created, "archived": self.apply_retention(today)}
+
+    def _is_partitioned(self, conn: Connection) -> bool:
+        return conn.execute(text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'notifications'"
+        )).first() is not None
+
+    def list_partitions(self, conn: Connection) -> List[str]:
+        return list(conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'notifications' ORDER BY c.relname"
+        )).scalars())
+
+    def ensure_partitions(self, conn: Connection, today: date) -> List[str]:
+        """Create the current month's partition and NOTIFICATION_PARTITIONS_AHEAD more"""
+        existing = set(self.list_partitions(conn))
+        created = []
+        # Rows outside every monthly range land here instead of failing the insert
+        if "notifications_default" not in existing:
+            conn.execute(text("CREATE TABLE notifications_default PARTITION OF notifications DEFAULT"))
+            created.append("notifications_default")
+
+        for offset in range(settings.NOTIFICATION_PARTITIONS_AHEAD + 1):
+            start, end = month_start(today, offset), month_start(today, offset + 1)
+            name = partition_name(start)
+            if name in existing:
+                continue
+            conn.execute(text(
+                f"CREATE TABLE {name} PARTITION OF notifications "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+            ))
+            created.append(name)
+        return created
+
+    def list_detached(self, conn: Connection) -> List[str]:
+        """Monthly tables no longer attached to notifications, left over from an interrupted archive"""
+        return [
+            name for name in conn.execute(text(
+                "SELECT c.relname FROM pg_class c "
+                "WHERE c.relname LIKE 'notifications\\_y%' AND c.relkind = 'r' "
+                "AND NOT EXISTS (SELECT 1 FROM pg_inherits i WHERE i.inhrelid = c.oid) "
+                "ORDER BY c.relname"
+            )).scalars()
+            if PARTITION_NAME.match(name)
+        ]
+
+    def apply_retention(self, today: date) -> List[str]:
+        """Archive, detach and drop monthly partitions older than the retention period"""
+        cutoff = month_start(today, -settings.NOTIFICATION_RETENTION_MONTHS)
+        with engine.connect() as conn:
+            expired = _expired(self.list_partitions(conn), cutoff)
+            detached = _expired(self.list_detached(conn), cutoff)
+
+        archived = []
+        # A partition stays attached until its archive is written, so a failed
+        # COPY leaves it where the next run finds it again. Tables detached by
+        # hand (or by an older version of this job) are archived as well.
+        for name in expired + detached:
+            self._archive_table(name, detach=name in expired)
+            archived.append(name)
+        return archived
+
+    def _archive_path(self, name: str, suffix: str) -> str:
+        os.makedirs(settings.NOTIFICATION_ARCHIVE_DIR, exist_ok=True)
+        return os.path.join(settings.NOTIFICATION_ARCHIVE_DIR, f"{name}.{suffix}.gz")
+
+    def _archive_table(self, name: str, detach: bool):
+        """COPY the table to its archive file, then detach and drop it in one transaction"""
+        raw = engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            # Holds off late inserts into the partition until it is gone
+            cursor.execute(f"LOCK TABLE {name} IN SHARE MODE")
+            with gzip.open(self._archive_path(name, "csv"), "wt") as archive:
+                cursor.copy_expert(f"COPY {name} TO STDOUT WITH CSV HEADER", archive)
+            if detach:
+                cursor.execute(f"ALTER TABLE notifications DETACH PARTITION {name}")
+            cursor.execute(f"DROP TABLE {name}")
+            raw.commit()
+        finally:
+            raw.close()
+
+    def _archive_rows(self, today: date) -> List[str]:
+        """Row-level retention for databases without partitioning"""
+        cutoff_at = retained_since(today)
+        cutoff = cutoff_at.date()
+        path = None
+        columns = [column.name for column in Notification.__table__.columns]
+
+        db = SessionLocal()
+        try:
+            while True:
+                rows = (
+                    db.query(Notification)
+                    .filter(Notification.created_at < cutoff_at)
+                    .order_by(Notification.id)
+                    .limit(settings.NOTIFICATION_ARCHIVE_BATCH_SIZE)
+                    .all()
+                )
+                if not rows:
+                    break
+                if path is None:
+                    path = self._archive_path(f"notifications_before_{cutoff.isoformat()}", "jsonl")
+                with gzip.open(path, "at") as archive:
+                    for row in rows:
+                        archive.write(json.dumps({c: getattr(row, c) for c in columns}, default=str) + "\n")
+                db.query(Notification).filter(
+                    Notification.id.in_([row.id for row in rows])
+                ).delete(synchronize_session=False)
+                db.commit()
+        finally:
+            db.close()
+        return [path] if path else []
+
+notification_partitions = NotificationPartitionManager()
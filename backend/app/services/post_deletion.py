@@ -0,0 +1,189 @@
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models import Comment, Like, Post, PostHashtag, PostMention, User
+from app.models.deletion import DeletionStatus, PostDeletion
+
+def not_deleted(model: Any) -> ColumnElement:
+    """
+    Condition leaving out deleted posts, or comments on them: the rows stay
+    until the background cascade gets to them, but no read may return them
+    """
+    if model is Post:
+        return Post.deleted_at.is_(None)
+    return select(Post.id).where(Post.id == model.post_id, Post.deleted_at.is_(None)).exists()
+
+def schedule_deletion(db: Session, post: Post, requested_by: User) -> PostDeletion:
+    """
+    Soft-delete ``post`` and queue the removal of its comments and likes,
+    in the caller's transaction. Callers lock the post row first, so
+    concurrent deletes of one post queue a single job.
+    """
+    post.deleted_at = datetime.now(timezone.utc)
+    post.hot_score = 0.0
+    job = PostDeletion(post_id=post.id, requested_by=requested_by.id)
+    db.add(job)
+    return job
+
+class PostDeletionWorker:
+    """
+    Background worker carrying out PostDeletion jobs. A job is leased by
+    one worker at a time and worked off in batches of DELETION_BATCH_SIZE
+    rows, each in its own short transaction that also renews the lease:
+    likes on the post's comments, then likes on the post, then the
+    comments themselves, newest first (a reply always has a higher id than
+    its parent, so no batch deletes a comment before its replies). Batches
+    are recomputed from what is left, so a job taken over after a stalled
+    worker, or retried after an error, simply continues.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._job_id: Optional[int] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self):
+        while True:
+            try:
+                worked = await asyncio.to_thread(self.work_once)
+            except Exception as e:
+                print(f"Error in post deletion worker: {str(e)}")
+                worked = False
+            if not worked:
+                await asyncio.sleep(settings.DELETION_POLL_INTERVAL)
+
+    def work_once(self) -> bool:
+        """Run one batch of the current job, claiming a job first if needed; False when idle"""
+        if self._job_id is None:
+            self._job_id = self._claim()
+            if self._job_id is None:
+                return False
+        job_id = self._job_id
+        try:
+            if not self._batch(job_id):
+                self._job_id = None
+        except Exception as e:
+            self._job_id = None
+            self._fail(job_id, e)
+        return True
+
+    def _claim(self) -> Optional[int]:
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            job = (
+                db.query(PostDeletion)
+                .filter(
+                    PostDeletion.status.in_([DeletionStatus.pending, DeletionStatus.running]),
+                    (PostDeletion.leased_until == None) | (PostDeletion.leased_until < now)
+                )
+                .order_by(PostDeletion.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                db.rollback()
+                return None
+            job.status = DeletionStatus.running
+            job.leased_until = now + timedelta(seconds=settings.DELETION_LEASE_TIMEOUT)
+            db.commit()
+            return job.id
+        finally:
+            db.close()
+
+    def _batches(self, post_id: int) -> List:
+        """Id queries for the next batch of each kind of row, in deletion order"""
+        comments = select(Comment.id).where(Comment.post_id == post_id)
+        return [
+            (Like, "likes_deleted", select(Like.id).where(Like.comment_id.in_(comments))),
+            (Like, "likes_deleted", select(Like.id).where(Like.post_id == post_id)),
+            (Comment, "comments_deleted", comments.order_by(Comment.id.desc())),
+        ]
+
+    def _batch(self, job_id: int) -> bool:
+        """Delete the next batch of rows of the job's post; returns whether the job is still going"""
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            job = (
+                db.query(PostDeletion)
+                .filter(
+                    PostDeletion.id == job_id,
+                    PostDeletion.status == DeletionStatus.running,
+                    PostDeletion.leased_until >= now
+                )
+                .with_for_update()
+                .first()
+            )
+            # Taken over after our lease ran out, or finished by the new holder
+            if job is None:
+                db.rollback()
+                return False
+            job.leased_until = now + timedelta(seconds=settings.DELETION_LEASE_TIMEOUT)
+
+            for model, counter, ids in self._batches(job.post_id):
+                batch = db.scalars(ids.limit(settings.DELETION_BATCH_SIZE)).all()
+                if batch:
+                    deleted = db.execute(
+                        delete(model).where(model.id.in_(batch)).execution_options(synchronize_session=False)
+                    ).rowcount
+                    setattr(job, counter, getattr(job, counter) + deleted)
+                    db.commit()
+                    return True
+
+            # Nothing left pointing at the post but its tag links and quotes
+            post_id = job.post_id
+            db.execute(delete(PostHashtag).where(PostHashtag.post_id == post_id))
+            db.execute(delete(PostMention).where(PostMention.post_id == post_id))
+            db.execute(
+                update(Post).where(Post.parent_id == post_id).values(parent_id=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(delete(Post).where(Post.id == post_id).execution_options(synchronize_session=False))
+            job.status = DeletionStatus.done
+            job.leased_until = None
+            job.finished_at = now
+            db.commit()
+            return False
+        finally:
+            db.close()
+
+    def _fail(self, job_id: int, error: Exception):
+        """Release the job for a retry after a backoff, or give up"""
+        print(f"Error deleting post, job {job_id}: {str(error)}")
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            job = db.query(PostDeletion).filter(PostDeletion.id == job_id).with_for_update().first()
+            if job is None:
+                return
+            job.attempts += 1
+            job.last_error = str(error)[:500]
+            if job.attempts >= settings.DELETION_MAX_ATTEMPTS:
+                job.status = DeletionStatus.failed
+                job.leased_until = None
+            else:
+                job.status = DeletionStatus.pending
+                job.leased_until = now + timedelta(seconds=min(2 ** job.attempts, 300))
+            db.commit()
+        finally:
+            db.close()
+
+post_deletions = PostDeletionWorker()
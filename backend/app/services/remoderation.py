@@ -0,0 +1,276 @@
+import asyncio
+import time
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from uuid import uuid4
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.comment import Comment
+from app.models.job import JobState
+from app.models.post import Post
+from app.services.ai_moderation import ai_moderator, moderation_columns
+
+JOB_NAME = "remoderation"
+PHASES = (("posts", Post), ("comments", Comment))
+
+class LeaseLost(Exception):
+    """Another worker took over the job"""
+
+class RemoderationJob:
+    """
+    Reclassifies every post and then every comment after a model or policy
+    change. Rows are streamed in id order with a server-side cursor, sent to
+    AIModeration in batches with a bounded number of requests in flight, and
+    only rows whose verdict changed are written, with one bulk UPDATE per
+    wave. Each wave commits a checkpoint (phase, last id, counters) to
+    job_states together with its updates, so a crashed or restarted job
+    resumes where it stopped. Throughput is capped at
+    REMODERATION_MAX_ROWS_PER_SECOND to keep load on the primary bounded.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        self._run_id: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self, restart: bool = False) -> Optional[Dict]:
+        """Start or continue the job; returns None if it is already running"""
+        if self.running:
+            return None
+        state = await asyncio.to_thread(self._claim, restart, False)
+        if state is not None:
+            self._task = asyncio.create_task(self.run(state))
+        return state
+
+    def resume(self):
+        """At startup: continue a job that was interrupted or whose worker died"""
+        if not self.running:
+            self._task = asyncio.create_task(self._resume())
+
+    async def pause(self) -> Optional[Dict]:
+        """Stop the job wherever it runs; a worker elsewhere stops at its next checkpoint"""
+        await self._cancel()
+        return await asyncio.to_thread(self._set_status, "paused")
+
+    async def stop(self):
+        """On shutdown; the next startup resumes immediately"""
+        if self.running:
+            await self._cancel()
+            if self._run_id is not None:
+                await asyncio.to_thread(self._set_status, "interrupted", self._run_id)
+
+    async def _cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def status(self) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            job = db.get(JobState, JOB_NAME)
+            if job is None:
+                return None
+            state = dict(job.state)
+        finally:
+            db.close()
+        remaining = max(state["total"] - state["processed"], 0)
+        rate = state.get("rows_per_second")
+        state["eta_seconds"] = round(remaining / rate) if rate and state["status"] == "running" else None
+        return state
+
+    async def _resume(self):
+        state = await asyncio.to_thread(self.status)
+        if state is None or state["status"] not in ("running", "interrupted"):
+            return
+        if state["status"] == "running":
+            # Give a live worker's lease the chance to expire first
+            heartbeat = datetime.fromisoformat(state["heartbeat"])
+            age = (datetime.now(timezone.utc) - heartbeat).total_seconds()
+            await asyncio.sleep(max(settings.REMODERATION_LEASE_TIMEOUT - age, 0))
+        state = await asyncio.to_thread(self._claim, False, True)
+        if state is not None:
+            await self.run(state)
+
+    def _claim(self, restart: bool, resume_only: bool) -> Optional[Dict]:
+        """Take ownership of the job under a row lock and return its state"""
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            job = db.query(JobState).filter(JobState.name == JOB_NAME).with_for_update().first()
+            current = job.state if job is not None else None
+            if current is not None and current["status"] == "running":
+                heartbeat = datetime.fromisoformat(current["heartbeat"])
+                if (now - heartbeat).total_seconds() < settings.REMODERATION_LEASE_TIMEOUT:
+                    return None
+            if resume_only and (current is None or current["status"] not in ("running", "interrupted")):
+                return None
+
+            if restart or current is None or current["status"] == "completed":
+                state = self._fresh_state(db, now)
+            else:
+                state = dict(current)
+            state.update(status="running", run_id=uuid4().hex, heartbeat=now.isoformat(), error=None)
+            if job is None:
+                db.add(JobState(name=JOB_NAME, state=state))
+            else:
+                job.state = state
+            db.commit()
+            return state
+        finally:
+            db.close()
+
+    def _fresh_state(self, db: Session, now: datetime) -> Dict:
+        total = sum(db.scalar(select(func.count(model.id))) for _, model in PHASES)
+        return {
+            "phase": PHASES[0][0],
+            "last_id": 0,
+            "total": total,
+            "processed": 0,
+            "changed": 0,
+            "rows_per_second": None,
+            "started_at": now.isoformat()
+        }
+
+    def _set_status(self, status: str, run_id: Optional[str] = None) -> Optional[Dict]:
+        """Release the job; clearing run_id makes its current owner stop"""
+        db = SessionLocal()
+        try:
+            job = db.query(JobState).filter(JobState.name == JOB_NAME).with_for_update().first()
+            if job is None or job.state["status"] not in ("running", "interrupted"):
+                return job.state if job is not None else None
+            if run_id is not None and job.state.get("run_id") != run_id:
+                return job.state
+            job.state = dict(job.state, status=status, run_id=None)
+            db.commit()
+            return job.state
+        finally:
+            db.close()
+
+    async def run(self, state: Dict):
+        self._run_id = state["run_id"]
+        try:
+            await self._process(state)
+        except LeaseLost:
+            pass
+        except Exception as e:
+            print(f"Error in re-moderation: {str(e)}")
+            state.update(status="failed", error=str(e))
+            with suppress(LeaseLost):
+                await asyncio.to_thread(self._checkpoint, state)
+
+    async def _process(self, state: Dict):
+        names = [name for name, _ in PHASES]
+        for name, model in PHASES[names.index(state["phase"]):]:
+            if state["phase"] != name:
+                state.update(phase=name, last_id=0)
+            await self._process_model(model, state)
+        state["status"] = "completed"
+        await asyncio.to_thread(self._checkpoint, state)
+
+    def _batches(self, read: Session, model, after_id: int):
+        stmt = (
+            select(
+                model.id, model.content, model.is_moderated, model.is_negative,
+                model.moderation_severity, model.moderation_reason, model.is_hidden,
+                model.hate_score, model.offensive_score, model.moderation_policy_version
+            )
+            .where(model.id > after_id)
+            .order_by(model.id)
+        )
+        if read.get_bind().dialect.name == "postgresql":
+            # Server-side cursor; MVCC lets checkpoints commit while it is open
+            yield from read.execute(
+                stmt.execution_options(yield_per=settings.REMODERATION_BATCH_SIZE)
+            ).partitions()
+            return
+        # SQLite cannot commit a write while a reader holds the database, so
+        # page by id in short transactions instead
+        while True:
+            rows = read.execute(
+                stmt.where(model.id > after_id).limit(settings.REMODERATION_BATCH_SIZE)
+            ).all()
+            read.commit()
+            if not rows:
+                return
+            yield rows
+            after_id = rows[-1].id
+
+    async def _process_model(self, model, state: Dict):
+        read = SessionLocal()
+        try:
+            partitions = self._batches(read, model, state["last_id"])
+            wave_started = time.monotonic()
+            while True:
+                wave = []
+                for _ in range(settings.REMODERATION_CONCURRENCY):
+                    rows = await asyncio.to_thread(next, partitions, None)
+                    if not rows:
+                        break
+                    wave.append(rows)
+                if not wave:
+                    return
+
+                verdicts = await asyncio.gather(*(self._classify(rows) for rows in wave))
+                rows = [row for batch in wave for row in batch]
+                await asyncio.to_thread(
+                    self._write, model, rows, [verdict for batch in verdicts for verdict in batch], state
+                )
+
+                # Throttle to the configured rate, then measure what we achieved
+                elapsed = time.monotonic() - wave_started
+                await asyncio.sleep(max(len(rows) / settings.REMODERATION_MAX_ROWS_PER_SECOND - elapsed, 0))
+                now = time.monotonic()
+                state["rows_per_second"] = round(len(rows) / (now - wave_started), 2)
+                wave_started = now
+        finally:
+            read.close()
+
+    async def _classify(self, rows: List) -> List[Dict]:
+        for attempt in range(settings.REMODERATION_MAX_RETRIES):
+            try:
+                return await ai_moderator.analyze_batch([row.content for row in rows])
+            except Exception:
+                if attempt + 1 == settings.REMODERATION_MAX_RETRIES:
+                    raise
+                await asyncio.sleep(min(2 ** attempt, 30))
+
+    def _write(self, model, rows: List, verdicts: List[Dict], state: Dict):
+        """Bulk-update changed rows and advance the checkpoint in one transaction"""
+        updates = []
+        for row, verdict in zip(rows, verdicts):
+            values = moderation_columns(verdict)
+            if any(getattr(row, key) != value for key, value in values.items()):
+                updates.append({"id": row.id, **values})
+
+        progress = dict(
+            state,
+            last_id=rows[-1].id,
+            processed=state["processed"] + len(rows),
+            changed=state["changed"] + len(updates)
+        )
+        self._checkpoint(progress, (lambda db: db.execute(update(model), updates)) if updates else None)
+        state.update(progress)
+
+    def _checkpoint(self, state: Dict, work: Optional[Callable[[Session], None]] = None):
+        db = SessionLocal()
+        try:
+            job = db.query(JobState).filter(JobState.name == JOB_NAME).with_for_update().first()
+            if job is None or job.state.get("run_id") != state["run_id"]:
+                raise LeaseLost()
+            if work is not None:
+                work(db)
+            state["heartbeat"] = datetime.now(timezone.utc).isoformat()
+            job.state = dict(state)
+            db.commit()
+        finally:
+            db.close()
+
+remoderation_job = RemoderationJob()
@@ -0,0 +1,208 @@
+import base64
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import Float, and_, cast, event, func, literal_column, or_, select
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import ColumnElement
+from app.db.session import engine
+from app.models.comment import Comment
+from app.models.post import Post
+from app.services.post_deletion import not_deleted
+
+# Must match the expression indexes on posts/comments exactly, so the
+# configuration is inlined rather than bound as a parameter.
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+
+TOKEN = re.compile(r"\w+")
+
+def search_vector(content: ColumnElement) -> ColumnElement:
+    return func.to_tsvector(SEARCH_CONFIG, content)
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.lower())
+
+def encode_cursor(rank: float, item_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([rank, item_id])).decode()
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        rank, item_id = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(item_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+class InvertedIndex:
+    """
+    In-process term -> {id: term frequency} index used when the database has
+    no full-text search (SQLite in development). Built from the table on
+    first use and kept current by ORM events afterwards; events arriving
+    before the build is done are queued and replayed over it, so rows
+    written while the table is being read aren't lost.
+    """
+
+    def __init__(self, model: Any):
+        self.model = model
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.terms: Dict[int, Set[str]] = {}
+        self.loaded = False
+        self._pending: Dict[int, Optional[str]] = {}
+        self._lock = threading.Lock()
+        # Held for the whole build, so writers only ever wait on _lock briefly
+        self._load_lock = threading.Lock()
+
+    def ensure_loaded(self, db: Session):
+        if self.loaded:
+            return
+        with self._load_lock:
+            if self.loaded:
+                return
+            # Nothing else touches postings until loaded is set
+            rows = db.execute(select(self.model.id, self.model.content)).yield_per(1000)
+            for item_id, content in rows:
+                self._add(item_id, content)
+            with self._lock:
+                for item_id, content in self._pending.items():
+                    self._replace(item_id, content)
+                self._pending = {}
+                self.loaded = True
+
+    def _add(self, item_id: int, content: str):
+        counts = Counter(tokenize(content or ""))
+        self.terms[item_id] = set(counts)
+        for term, count in counts.items():
+            self.postings.setdefault(term, {})[item_id] = count
+
+    def _remove(self, item_id: int):
+        for term in self.terms.pop(item_id, ()):
+            documents = self.postings.get(term)
+            if documents is not None:
+                documents.pop(item_id, None)
+                if not documents:
+                    del self.postings[term]
+
+    def _replace(self, item_id: int, content: Optional[str]):
+        self._remove(item_id)
+        if content is not None:
+            self._add(item_id, content)
+
+    def update(self, item_id: int, content: Optional[str]):
+        with self._lock:
+            if self.loaded:
+                self._replace(item_id, content)
+            else:
+                self._pending[item_id] = content
+
+    def search(self, terms: Sequence[str]) -> List[Tuple[float, int]]:
+        """(score, id) of documents containing every term, best first"""
+        # Under the lock: ORM events update postings from other threads
+        with self._lock:
+            documents = [self.postings.get(term, {}) for term in set(terms)]
+            if not documents or any(not d for d in documents):
+                return []
+            documents.sort(key=len)
+            total = max(len(self.terms), 1)
+            scores = {
+                item_id: sum(d[item_id] * math.log(1 + total / len(d)) for d in documents)
+                for item_id in documents[0]
+                if all(item_id in d for d in documents[1:])
+            }
+        return sorted(((score, item_id) for item_id, score in scores.items()), reverse=True)
+
+class SearchService:
+    def __init__(self):
+        self.indexes = {Post: InvertedIndex(Post), Comment: InvertedIndex(Comment)}
+
+    @property
+    def uses_database(self) -> bool:
+        return engine.dialect.name == "postgresql"
+
+    def search(
+        self,
+        db: Session,
+        model: Any,
+        columns: List[ColumnElement],
+        query: str,
+        viewer_id: int,
+        limit: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        Ranked search over ``model.content`` returning projection rows and the
+        cursor of the next page. Hidden items are only visible to their author;
+        deleted posts and their comments to no one.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        visible = ((model.is_hidden == False) | (model.user_id == viewer_id)) & not_deleted(model)
+        if self.uses_database:
+            return self._search_database(db, model, columns, query, visible, limit, after)
+        return self._search_index(db, model, columns, query, visible, limit, after)
+
+    def _search_database(self, db, model, columns, query, visible, limit, after):
+        tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+        vector = search_vector(model.content)
+        rank = cast(func.ts_rank_cd(vector, tsquery), Float)
+        stmt = (
+            select(*columns, rank.label("rank"))
+            .where(vector.op("@@")(tsquery), visible)
+            .order_by(rank.desc(), model.id.desc())
+            .limit(limit + 1)
+        )
+        if after is not None:
+            stmt = stmt.where(or_(rank < after[0], and_(rank == after[0], model.id < after[1])))
+        rows = db.execute(stmt).all()
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1].rank, page[-1].id) if len(rows) > limit else None
+        return page, next_cursor
+
+    def _search_index(self, db, model, columns, query, visible, limit, after):
+        terms = tokenize(query)
+        if not terms:
+            return [], None
+        index = self.indexes[model]
+        index.ensure_loaded(db)
+        ranked = index.search(terms)
+        if after is not None:
+            ranked = [(score, item_id) for score, item_id in ranked if (score, item_id) < after]
+
+        # Resolve candidates in rank order, letting the database apply visibility
+        matches = []
+        chunk = max(limit * 2, 50)
+        for start in range(0, len(ranked), chunk):
+            candidates = ranked[start:start + chunk]
+            found = {
+                row.id: row for row in db.execute(
+                    select(*columns).where(model.id.in_([item_id for _, item_id in candidates]), visible)
+                )
+            }
+            matches.extend((score, found[item_id]) for score, item_id in candidates if item_id in found)
+            if len(matches) > limit:
+                break
+
+        page = matches[:limit]
+        next_cursor = encode_cursor(page[-1][0], page[-1][1].id) if len(matches) > limit else None
+        return [row for _, row in page], next_cursor
+
+search_service = SearchService()
+
+def _track(model: Any):
+    index = search_service.indexes[model]
+
+    @event.listens_for(model, "after_insert")
+    @event.listens_for(model, "after_update")
+    def _index_content(mapper, connection, target):
+        index.update(target.id, target.content)
+
+    @event.listens_for(model, "after_delete")
+    def _unindex_content(mapper, connection, target):
+        index.update(target.id, None)
+
+# The index is only used without database full-text search; elsewhere it
+# would just queue every write, waiting for a load that never comes
+if not search_service.uses_database:
+    for _model in (Post, Comment):
+        _track(_model)
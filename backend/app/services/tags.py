@@ -0,0 +1,91 @@
+import re
+from typing import List, Set, Tuple
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from app.db.session import dialect_insert
+from app.models.notification import ActivityNotification, ActivityType, ContentType
+from app.models.post import Post
+from app.models.tag import Hashtag, PostHashtag, PostMention
+from app.models.user import User
+from app.services.activity_notifications import record_activity
+
+HASHTAG = re.compile(r"(?<![\w#])#(\w{1,50})")
+MENTION = re.compile(r"(?<![\w@])@(\w{3,50})")
+
+def extract_hashtags(content: str) -> Set[str]:
+    return {tag.lower() for tag in HASHTAG.findall(content)}
+
+def extract_mentions(content: str) -> Set[str]:
+    return set(MENTION.findall(content))
+
+def _hashtag_ids(db: Session, names: Set[str]) -> dict:
+    """Ids for hashtag names, creating the missing ones"""
+    ids = dict(db.execute(select(Hashtag.name, Hashtag.id).where(Hashtag.name.in_(names))).all())
+    missing = names - ids.keys()
+    if missing:
+        db.execute(
+            dialect_insert(db, Hashtag).on_conflict_do_nothing(index_elements=["name"]),
+            [{"name": name} for name in missing]
+        )
+        ids.update(db.execute(select(Hashtag.name, Hashtag.id).where(Hashtag.name.in_(missing))).all())
+    return ids
+
+def sync_post_tags(
+    db: Session,
+    post: Post,
+    author: User,
+    notify: bool = True
+) -> Tuple[Set[str], List[ActivityNotification]]:
+    """
+    Bring a post's hashtag and mention links in line with its content, in the
+    caller's transaction. Returns the newly attached hashtags and the mention
+    notifications to push once the transaction commits; ``notify=False``
+    links mentions without notifying (hidden posts).
+    """
+    # Hashtags
+    tags = extract_hashtags(post.content)
+    linked = dict(db.execute(
+        select(Hashtag.name, Hashtag.id)
+        .join(PostHashtag, PostHashtag.hashtag_id == Hashtag.id)
+        .where(PostHashtag.post_id == post.id)
+    ).all())
+    removed = [linked[name] for name in linked.keys() - tags]
+    if removed:
+        db.execute(delete(PostHashtag).where(
+            PostHashtag.post_id == post.id, PostHashtag.hashtag_id.in_(removed)
+        ))
+    added_tags = tags - linked.keys()
+    if added_tags:
+        ids = _hashtag_ids(db, added_tags)
+        db.execute(insert(PostHashtag), [
+            {"hashtag_id": ids[name], "post_id": post.id} for name in added_tags
+        ])
+
+    # Mentions: one lookup for every username in the post
+    usernames = extract_mentions(post.content)
+    mentioned = set(db.execute(
+        select(User.id).where(User.username.in_(usernames))
+    ).scalars()) if usernames else set()
+    linked_users = set(db.execute(
+        select(PostMention.user_id).where(PostMention.post_id == post.id)
+    ).scalars())
+    if linked_users - mentioned:
+        db.execute(delete(PostMention).where(
+            PostMention.post_id == post.id, PostMention.user_id.in_(linked_users - mentioned)
+        ))
+    added_users = mentioned - linked_users
+    if added_users:
+        db.execute(insert(PostMention), [
+            {"user_id": user_id, "post_id": post.id} for user_id in added_users
+        ])
+
+    if not notify:
+        return added_tags, []
+    notifications = [
+        notification for notification in (
+            record_activity(db, user_id, author, ActivityType.mention, ContentType.post, post.id)
+            for user_id in added_users
+        )
+        if notification is not None
+    ]
+    return added_tags, notifications
@@ -0,0 +1,96 @@
+import asyncio
+from contextlib import suppress
+from datetime import datetime, timezone
+from typing import Optional
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.job import JobState
+from app.models.post import Post
+
+JOB_NAME = "trending_decay"
+
+def bump(db: Session, post_id: int, weight: float):
+    """
+    Add (or with a negative weight, remove) engagement to a post's hot score
+    as a single atomic UPDATE in the caller's transaction.
+    """
+    if weight >= 0:
+        score = Post.hot_score + weight
+    else:
+        score = case((Post.hot_score > -weight, Post.hot_score + weight), else_=0.0)
+    db.execute(
+        update(Post)
+        .where(Post.id == post_id)
+        # Engagement isn't an edit: keep updated_at (and with it the ETag)
+        # from being touched by its onupdate
+        .values(hot_score=score, updated_at=Post.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+class TrendingDecayJob:
+    """
+    Periodically decays every warm post's score in one set-based UPDATE. The
+    factor is derived from the time since the previous run (stored in
+    job_states and locked while decaying), so running the job in several
+    processes never decays twice.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(settings.TRENDING_DECAY_INTERVAL)
+            try:
+                await asyncio.to_thread(self.decay)
+            except Exception as e:
+                print(f"Error in trending decay: {str(e)}")
+
+    def decay(self, now: Optional[datetime] = None) -> Optional[float]:
+        """Apply the decay accumulated since the last run; returns the factor used"""
+        now = now or datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            job = db.query(JobState).filter(JobState.name == JOB_NAME).with_for_update().first()
+            if job is None:
+                db.add(JobState(name=JOB_NAME, state={"decayed_at": now.isoformat()}))
+                db.commit()
+                return None
+
+            elapsed = (now - datetime.fromisoformat(job.state["decayed_at"])).total_seconds()
+            # Another process decayed recently
+            if elapsed < settings.TRENDING_DECAY_INTERVAL / 2:
+                db.rollback()
+                return None
+
+            factor = 0.5 ** (elapsed / settings.TRENDING_HALF_LIFE)
+            decayed = Post.hot_score * factor
+            db.execute(
+                update(Post)
+                .where(Post.hot_score > 0)
+                .values(
+                    hot_score=case((decayed < settings.TRENDING_MIN_SCORE, 0.0), else_=decayed),
+                    updated_at=Post.updated_at
+                )
+                .execution_options(synchronize_session=False)
+            )
+            job.state = {"decayed_at": now.isoformat()}
+            db.commit()
+            return factor
+        finally:
+            db.close()
+
+trending_decay = TrendingDecayJob()
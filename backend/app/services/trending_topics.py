@@ -0,0 +1,115 @@
+import heapq
+import threading
+import time
+from collections import deque
+from hashlib import blake2b
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+class CountMinSketch:
+    """Approximate counts in fixed memory; estimates never undercount"""
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.table = np.zeros((depth, width), dtype=np.uint32)
+        self._rows = np.arange(depth)
+
+    def _columns(self, key: str) -> np.ndarray:
+        digest = blake2b(key.encode(), digest_size=8 * self.depth).digest()
+        return np.frombuffer(digest, dtype=np.uint64) % self.width
+
+    def add(self, key: str, count: int = 1) -> int:
+        """Add to ``key`` and return its new estimate"""
+        columns = self._columns(key)
+        self.table[self._rows, columns] += count
+        return int(self.table[self._rows, columns].min())
+
+    def estimate(self, key: str) -> int:
+        return int(self.table[self._rows, self._columns(key)].min())
+
+class TopK:
+    """
+    The k keys with the highest counts seen so far. Counts only grow, so
+    updates push a fresh heap entry and stale ones are dropped lazily.
+    """
+
+    def __init__(self, k: int):
+        self.k = k
+        self.counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def _min(self) -> int:
+        while self._heap and self.counts.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else 0
+
+    def update(self, key: str, count: int):
+        if key not in self.counts and len(self.counts) >= self.k and count <= self._min():
+            return
+        self.counts[key] = count
+        heapq.heappush(self._heap, (count, key))
+        while len(self.counts) > self.k:
+            smallest, evicted = heapq.heappop(self._heap)
+            if self.counts.get(evicted) == smallest:
+                del self.counts[evicted]
+        # Keep stale entries from piling up
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c, key) for key, c in self.counts.items()]
+            heapq.heapify(self._heap)
+
+class _Window:
+    __slots__ = ("start", "sketch", "top")
+
+    def __init__(self, start: int):
+        self.start = start
+        self.sketch = CountMinSketch(settings.TRENDING_TOPICS_SKETCH_WIDTH, settings.TRENDING_TOPICS_SKETCH_DEPTH)
+        self.top = TopK(settings.TRENDING_TOPICS_TOP_K)
+
+class TrendingTopics:
+    """
+    Streaming heavy hitters over a ring of time windows. Each window holds a
+    count-min sketch and a top-K heap, so memory stays fixed however many
+    distinct tags are posted and expired windows are dropped whole. Counts
+    are per process.
+    """
+
+    def __init__(self):
+        self._windows: deque = deque()
+        self._lock = threading.Lock()
+
+    def _current(self, now: float) -> _Window:
+        start = int(now) // settings.TRENDING_TOPICS_WINDOW * settings.TRENDING_TOPICS_WINDOW
+        if not self._windows or self._windows[-1].start < start:
+            self._windows.append(_Window(start))
+        self._expire(now)
+        return self._windows[-1]
+
+    def _expire(self, now: float):
+        horizon = now - settings.TRENDING_TOPICS_WINDOW * settings.TRENDING_TOPICS_WINDOWS
+        while self._windows and self._windows[0].start + settings.TRENDING_TOPICS_WINDOW <= horizon:
+            self._windows.popleft()
+
+    def add(self, tags: Iterable[str], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            window = self._current(now)
+            for tag in tags:
+                window.top.update(tag, window.sketch.add(tag))
+
+    def top(self, limit: int = 10, now: Optional[float] = None) -> List[Tuple[str, int]]:
+        """Highest estimated counts across the live windows"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            candidates = set()
+            for window in self._windows:
+                candidates.update(window.top.counts)
+            totals = [
+                (tag, sum(window.sketch.estimate(tag) for window in self._windows))
+                for tag in candidates
+            ]
+        return heapq.nlargest(limit, totals, key=lambda item: item[1])
+
+trending_topics = TrendingTopics()
@@ -1,67 +1,204 @@
 from fastapi import WebSocket, WebSocketDisconnect, Depends, HTTPException
-from typing import Dict, List
-import json
+from typing import Dict, Hashable, List, Optional
+import asyncio
+import time
+import orjson
+from app.core.config import settings
+from app.core.metrics import WS_CONNECTIONS, WS_DELIVERY_LATENCY, WS_FRAMES, timed
 from app.core.security import verify_token
 from app.models.user import User
 
+def encode_message(message: dict) -> str:
+    """Serialize a message once so the same frame can be reused for every recipient"""
+    return orjson.dumps(message, default=str).decode()
+
+PING_FRAME = encode_message({"type": "ping"})
+
+class Connection:
+    """A single client socket and its delivery state"""
+    __slots__ = ("websocket", "user_id", "coalesce_window", "pending", "flush_task", "last_seen")
+
+    def __init__(self, websocket: WebSocket, user_id: int, coalesce_window: float = 0):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.coalesce_window = coalesce_window
+        # Frames waiting for the coalescing window to close: {entity_key: frame}
+        self.pending: Optional[Dict[Hashable, str]] = None
+        self.flush_task: Optional[asyncio.Task] = None
+        self.last_seen = time.monotonic()
+
 class ConnectionManager:
     def __init__(self):
-        # Store active connections: {user_id: WebSocket}
-        self.active_connections: Dict[int, WebSocket] = {}
+        # Store active connections: {user_id: [Connection, ...]}
+        # A user is online exactly when they have an entry here.
+        self.active_connections: Dict[int, List[Connection]] = {}
+        self.connection_count = 0
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    async def connect(
+        self, websocket: WebSocket, user_id: int, coalesce_window: float = 0
+    ) -> Optional[Connection]:
+        """Accept a socket, enforcing the global and per-user connection limits"""
+        if self.connection_count >= settings.WS_MAX_CONNECTIONS:
+            await websocket.close(code=1013)  # Try Again Later
+            return None
 
-    async def connect(self, websocket: WebSocket, user_id: int):
         await websocket.accept()
-        self.active_connections[user_id] = websocket
-
-    def disconnect(self, user_id: int):
-        if user_id in self.active_connections:
-            del self.active_connections[user_id]
-
-    async def broadcast(self, message: dict):
-        """Broadcast message to all connected clients"""
-        disconnected_users = []
-        for user_id, connection in self.active_connections.items():
-            try:
-                await connection.send_json(message)
-            except WebSocketDisconnect:
-                disconnected_users.append(user_id)
-        
-        # Clean up disconnected users
-        for user_id in disconnected_users:
-            self.disconnect(user_id)
-
-    async def send_personal_message(self, message: dict, user_id: int):
-        """Send message to a specific user"""
-        if user_id in self.active_connections:
-            try:
-                await self.active_connections[user_id].send_json(message)
-            except WebSocketDisconnect:
-                self.disconnect(user_id)
+        connection = Connection(websocket, user_id, coalesce_window)
+        connections = self.active_connections.setdefault(user_id, [])
+        connections.append(connection)
+        self.connection_count += 1
+        WS_CONNECTIONS.inc()
+
+        # Drop the oldest sockets of a user over the limit
+        while len(connections) > settings.WS_MAX_CONNECTIONS_PER_USER:
+            await self._close(connections[0], code=1008)
+
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat())
+        return connection
+
+    def disconnect(self, connection: Connection):
+        connections = self.active_connections.get(connection.user_id)
+        if not connections or connection not in connections:
+            return
+        connections.remove(connection)
+        if not connections:
+            del self.active_connections[connection.user_id]
+        self.connection_count -= 1
+        WS_CONNECTIONS.dec()
+        if connection.flush_task is not None:
+            connection.flush_task.cancel()
+            connection.flush_task = None
+        connection.pending = None
+
+    async def _close(self, connection: Connection, code: int = 1000):
+        self.disconnect(connection)
+        try:
+            await connection.websocket.close(code=code)
+        except Exception:
+            # The peer is already gone
+            pass
+
+    def is_online(self, user_id: int) -> bool:
+        return user_id in self.active_connections
+
+    def online_users(self) -> List[int]:
+        return list(self.active_connections)
+
+    def touch(self, connection: Connection):
+        """Record that the client is still alive"""
+        connection.last_seen = time.monotonic()
+
+    async def _heartbeat(self):
+        """Ping every connection periodically and reap the ones that stopped answering"""
+        while self.active_connections:
+            await asyncio.sleep(settings.WS_HEARTBEAT_INTERVAL)
+            await self.reap_idle()
+            for user_id in list(self.active_connections):
+                for connection in list(self.active_connections.get(user_id, ())):
+                    await self._send(connection, PING_FRAME)
+
+    async def reap_idle(self, now: Optional[float] = None) -> int:
+        """Close connections that have been silent for longer than the idle timeout"""
+        deadline = (now or time.monotonic()) - settings.WS_IDLE_TIMEOUT
+        idle = [
+            connection
+            for connections in self.active_connections.values()
+            for connection in connections
+            if connection.last_seen < deadline
+        ]
+        for connection in idle:
+            await self._close(connection, code=1001)
+        return len(idle)
+
+    async def _send(self, connection: Connection, frame: str) -> bool:
+        """Send an already encoded frame, dropping the connection if it is gone"""
+        try:
+            await connection.websocket.send_text(frame)
+            WS_FRAMES.labels("sent").inc()
+            return True
+        except (WebSocketDisconnect, RuntimeError):
+            WS_FRAMES.labels("failed").inc()
+            self.disconnect(connection)
+            return False
+
+    def _enqueue(self, connection: Connection, key: Hashable, frame: str):
+        """Keep only the latest frame per entity until the connection's window closes"""
+        if connection.pending is None:
+            connection.pending = {}
+        connection.pending.pop(key, None)
+        connection.pending[key] = frame
+        if connection.flush_task is None:
+            connection.flush_task = asyncio.create_task(self._flush_after(connection))
+
+    async def _flush_after(self, connection: Connection):
+        await asyncio.sleep(connection.coalesce_window)
+        connection.flush_task = None
+        pending, connection.pending = connection.pending or {}, None
+        for frame in pending.values():
+            if not await self._send(connection, frame):
+                break
+
+    @timed(WS_DELIVERY_LATENCY, kind="broadcast")
+    async def broadcast(self, message: dict, key: Optional[Hashable] = None):
+        """Broadcast message to all connected clients
+
+        The message is encoded once and the same frame is sent to every
+        connection. When ``key`` identifies the entity being updated,
+        connections with a coalescing window only receive the latest update
+        for that entity per window.
+        """
+        frame = encode_message(message)
+        for user_id in list(self.active_connections):
+            for connection in list(self.active_connections.get(user_id, ())):
+                if key is not None and connection.coalesce_window > 0:
+                    self._enqueue(connection, key, frame)
+                else:
+                    await self._send(connection, frame)
+
+    @timed(WS_DELIVERY_LATENCY, kind="personal")
+    async def send_personal_message(self, message: dict, user_id: int) -> bool:
+        """Send message to every connection of a specific user; returns whether any got it"""
+        connections = self.active_connections.get(user_id)
+        delivered = False
+        if connections:
+            frame = encode_message(message)
+            for connection in list(connections):
+                delivered = await self._send(connection, frame) or delivered
+        return delivered
 
 manager = ConnectionManager()
 
-async def get_websocket_user(token: str) -> User:
+async def get_websocket_user(token: str) -> int:
     """Verify WebSocket connection token"""
     payload = verify_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
-    return payload.get("sub")  # user_id
+    try:
+        return int(payload["sub"])  # user_id
+    except (KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid token subject")
 
-async def handle_websocket(websocket: WebSocket, token: str):
+async def handle_websocket(websocket: WebSocket, token: str, coalesce_ms: int = 0):
     """Handle WebSocket connections"""
     try:
         user_id = await get_websocket_user(token)
-        await manager.connect(websocket, user_id)
-        
-        try:
-            while True:
-                # Wait for messages (if needed for future features)
-                data = await websocket.receive_text()
-                # Process incoming messages if needed
-        except WebSocketDisconnect:
-            manager.disconnect(user_id)
     except HTTPException:
         await websocket.close(code=1008)  # Policy Violation
+        return
+
+    connection = await manager.connect(websocket, user_id, coalesce_window=coalesce_ms / 1000)
+    if connection is None:
+        return
+
+    try:
+        while True:
+            # Any client frame (including "pong") counts as a heartbeat
+            await websocket.receive_text()
+            manager.touch(connection)
+    except WebSocketDisconnect:
+        manager.disconnect(connection)
 
 # Notification functions
 async def notify_post_created(post_data: dict):
@@ -72,11 +209,11 @@ async def notify_post_created(post_data: dict):
     })
 
 async def notify_post_updated(post_data: dict):
-    """Notify all users about post update"""
+    """Notify all users about post update (edits, like and comment counts), coalesced per post"""
     await manager.broadcast({
         "type": "post_updated",
         "data": post_data
-    })
+    }, key=("post", post_data.get("id")))
 
 async def notify_comment_created(comment_data: dict):
     """Notify relevant users about new comment"""
@@ -85,9 +222,9 @@ async def notify_comment_created(comment_data: dict):
         "data": comment_data
     })
 
-async def notify_content_moderated(content_data: dict, user_id: int):
-    """Notify user about content moderation"""
-    await manager.send_personal_message({
+async def notify_content_moderated(content_data: dict, user_id: int) -> bool:
+    """Notify user about content moderation; returns whether one of their sockets got it"""
+    return await manager.send_personal_message({
         "type": "content_moderated",
         "data": content_data
-    }, user_id) 
\ No newline at end of file
+    }, user_id)
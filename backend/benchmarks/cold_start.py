@@ -0,0 +1,145 @@
+"""
+Measure cold start: how long importing app.main takes, how long a fresh
+uvicorn process needs until /health and /ready answer, the startup phases
+reported by /ready, and the latency of the first requests served.
+
+Run once with and once without --no-prewarm to see what pre-warming the
+pool and the moderation client buys the first requests.
+
+Usage: python -m benchmarks.cold_start --runs 5
+       python -m benchmarks.cold_start --runs 5 --no-prewarm --database-url postgresql://...
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.fake_moderation import FakeModerationServer
+from benchmarks.load import BACKEND_DIR, free_port
+
+def seed_user() -> str:
+    """Create the tables and one user; returns an access token for it"""
+    from app.core.security import create_access_token
+    from app.db.session import Base, SessionLocal, engine
+    from app.models import Post, User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = User(email=f"cold{time.time_ns()}@example.com", username=f"cold{time.time_ns()}", hashed_password="x")
+        db.add(user)
+        db.flush()
+        db.add(Post(content="cold start", user_id=user.id, is_moderated=True))
+        db.commit()
+        return create_access_token(user.id)
+    finally:
+        db.close()
+
+def import_time(env: Dict[str, str]) -> float:
+    code = "import time; started = time.perf_counter(); import app.main; print(time.perf_counter() - started)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=BACKEND_DIR, env={**os.environ, **env},
+        capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+async def boot(env: Dict[str, str], token: str, timeout: float) -> Dict:
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+    result = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=30) as client:
+            while "ready_s" not in result:
+                if process.poll() is not None:
+                    raise RuntimeError(f"API server exited with code {process.returncode}")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("API server did not become ready in time")
+                try:
+                    if "health_s" not in result and (await client.get("/health")).status_code == 200:
+                        result["health_s"] = time.perf_counter() - started
+                    response = await client.get("/ready")
+                    if response.status_code == 200:
+                        result["ready_s"] = time.perf_counter() - started
+                        result.update(response.json()["startup_seconds"])
+                except httpx.TransportError:
+                    await asyncio.sleep(0.01)
+
+            headers = {"Authorization": f"Bearer {token}"}
+            for name in ("first_feed_ms", "second_feed_ms"):
+                request_started = time.perf_counter()
+                (await client.get("/api/v1/posts/", headers=headers)).raise_for_status()
+                result[name] = (time.perf_counter() - request_started) * 1000
+            request_started = time.perf_counter()
+            response = await client.post("/api/v1/posts/", json={"content": "first post after boot"}, headers=headers)
+            response.raise_for_status()
+            result["first_post_ms"] = (time.perf_counter() - request_started) * 1000
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return result
+
+def summarize(runs: List[Dict]) -> Dict:
+    keys = [key for key in runs[0] if all(key in run for run in runs)]
+    return {
+        key: {
+            "median": round(statistics.median(run[key] for run in runs), 4),
+            "min": round(min(run[key] for run in runs), 4),
+            "max": round(max(run[key] for run in runs), 4),
+        }
+        for key in keys
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-prewarm", action="store_true")
+    parser.add_argument("--moderation-latency-ms", type=float, default=150)
+    parser.add_argument("--startup-timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{tempfile.mkdtemp()}/cold_start.db"
+    moderation = FakeModerationServer(latency_ms=args.moderation_latency_ms)
+    env = {
+        "DATABASE_URL": database_url,
+        "MODERATION_API_URL": moderation.start(),
+        "HUGGING_FACE_API_TOKEN": os.environ.get("HUGGING_FACE_API_TOKEN", "benchmark"),
+        "STARTUP_PREWARM": "false" if args.no_prewarm else "true",
+    }
+    os.environ.update(env)
+    try:
+        token = seed_user()
+        runs = []
+        for _ in range(args.runs):
+            run = {"import_s": import_time(env)}
+            run.update(asyncio.run(boot(env, token, args.startup_timeout)))
+            runs.append(run)
+    finally:
+        moderation.stop()
+
+    print(json.dumps({
+        "benchmark": "cold_start",
+        "database": database_url.split(":", 1)[0],
+        "prewarm": not args.no_prewarm,
+        "runs": args.runs,
+        "seconds_and_ms": summarize(runs),
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Local stand-in for the Hugging Face inference API used by AIModeration,
+with configurable latency and error rate.
+
+Point the app at it with MODERATION_API_URL=http://127.0.0.1:<port>/.
+
+Scores are derived from the text, so the same input always gets the same
+verdict: texts containing "hate" score as hate speech, "offensive" as
+offensive, anything else as clean.
+
+Usage: python -m benchmarks.fake_moderation --port 8081 --latency-ms 150 --error-rate 0.02
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List
+
+def scores(text: str) -> List[dict]:
+    lowered = text.lower()
+    hate = 0.9 if "hate" in lowered else 0.01
+    offensive = 0.8 if "offensive" in lowered else 0.02
+    return [
+        {"label": "hate", "score": hate},
+        {"label": "offensive", "score": offensive},
+        {"label": "nothate", "score": round(1 - hate, 4)},
+    ]
+
+class FakeModerationServer:
+    """Threaded HTTP server answering inference requests in the API's shape"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        error_rate: float = 0,
+        seed: int = 0
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> str:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-moderation", daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _plan(self):
+        """Delay and failure for one request"""
+        with self._lock:
+            self.requests += 1
+            delay = max(self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms), 0) / 1000
+            fail = self._rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                delay, fail = server._plan()
+                time.sleep(delay)
+                if fail:
+                    self._reply(503, {"error": "Model is currently loading", "estimated_time": 20.0})
+                    return
+                inputs = json.loads(body or b"{}").get("inputs", "")
+                if isinstance(inputs, list):
+                    self._reply(200, [scores(text) for text in inputs])
+                else:
+                    self._reply(200, [scores(inputs)])
+
+            def _reply(self, status: int, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency-ms", type=float, default=150)
+    parser.add_argument("--jitter-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    server = FakeModerationServer(args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate)
+    print(f"Fake moderation server listening on {server.start()}")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"{server.requests} request(s), {server.errors} failed")
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
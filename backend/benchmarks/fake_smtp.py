@@ -0,0 +1,87 @@
+"""
+Local SMTP stand-in that accepts every message and keeps it in memory.
+
+Point the app at it with MAIL_SERVER=127.0.0.1 MAIL_PORT=<port> MAIL_STARTTLS=false.
+
+Usage: python -m benchmarks.fake_smtp --port 2525
+"""
+import argparse
+import asyncio
+from typing import List
+
+class FakeSMTPServer:
+    """Speaks just enough SMTP for smtplib.send_message"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: List[dict] = []
+        self._server = None
+
+    async def start(self) -> int:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        def reply(line: str):
+            writer.write((line + "\r\n").encode())
+
+        reply("220 fake-smtp ready")
+        sender, recipients = None, []
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            command = line.decode(errors="replace").strip()
+            verb = command[:4].upper()
+            if verb in ("HELO", "EHLO"):
+                reply("250 fake-smtp")
+            elif verb == "MAIL":
+                sender, recipients = command[10:].strip("<>"), []
+                reply("250 OK")
+            elif verb == "RCPT":
+                recipients.append(command[8:].strip("<>"))
+                reply("250 OK")
+            elif verb == "DATA":
+                reply("354 End data with <CR><LF>.<CR><LF>")
+                await writer.drain()
+                body = []
+                while True:
+                    data = await reader.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    body.append(data.decode(errors="replace"))
+                self.messages.append({"from": sender, "to": recipients, "data": "".join(body)})
+                reply("250 OK")
+            elif verb == "QUIT":
+                reply("221 Bye")
+                await writer.drain()
+                break
+            else:
+                reply("250 OK")
+            await writer.drain()
+        writer.close()
+
+async def serve(host: str, port: int):
+    server = FakeSMTPServer(host, port)
+    print(f"Fake SMTP server listening on {host}:{await server.start()}")
+    while True:
+        await asyncio.sleep(5)
+        if server.messages:
+            print(f"{len(server.messages)} message(s) received")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+if __name__ == "__main__":
+    main()
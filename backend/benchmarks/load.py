@@ -0,0 +1,409 @@
+"""
+End-to-end load test: boots the API under uvicorn against a database of
+your choice, with AIModeration pointed at a local fake inference server,
+and drives mixed workloads over HTTP and WebSockets.
+
+Each scenario runs for --duration seconds with --concurrency clients and
+reports requests, errors, throughput and p50/p95/p99 latency as JSON.
+Pass --baseline with an earlier --output file to get the change in
+throughput and latency per scenario.
+
+Scenarios:
+  feed_reads      GET the first feed pages
+  create_post     POST new posts (each one is moderated)
+  create_comment  POST comments on seeded posts
+  like_storm      many users toggling likes on a few hot posts
+  ws_fanout       likes on posts owned by connected users; latency is from
+                  sending the like to the activity message arriving
+
+startup_s is the time from launching the server to /ready answering 200;
+see benchmarks.cold_start for a breakdown.
+
+After the scenarios, checks verifies that engagement is not mistaken for
+an edit: a like and an unlike leave a post's updated_at and ETag as they
+were, and a trending decay pass leaves updated_at alone. The command exits
+with status 1 if a check fails.
+
+Usage: python -m benchmarks.load --duration 20 --concurrency 32 --output run.json
+       python -m benchmarks.load --database-url postgresql://... --baseline run.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import websockets
+
+from benchmarks.fake_moderation import FakeModerationServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = ("feed_reads", "create_post", "create_comment", "like_storm", "ws_fanout")
+WORDS = (
+    "morning", "coffee", "release", "weekend", "music", "garden", "python", "travel",
+    "pizza", "running", "sunset", "library", "project", "offensive", "hate", "concert"
+)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return round(sorted_values[index] * 1000, 2)
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+
+def compare(current: Dict, baseline: Dict) -> Dict:
+    """Relative change per scenario, in percent; positive latency change is slower"""
+    deltas = {}
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        deltas[name] = {
+            key: round((result[key] - before[key]) / before[key] * 100, 1)
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            if result.get(key) is not None and before.get(key)
+        }
+    return deltas
+
+def random_text(rng: random.Random, serial: int) -> str:
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 20)))
+    return f"{words} #{rng.choice(WORDS)} {serial}"
+
+def seed(users: int, posts: int, seed_value: int) -> Dict:
+    """Insert users and posts straight into the database; returns ids and tokens"""
+    # Imported here so DATABASE_URL from the command line is picked up
+    from app.core.security import create_access_token
+    from app.db.session import Base, SessionLocal, engine
+    from app.models import Post, User
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed_value)
+    db = SessionLocal()
+    try:
+        prefix = f"load{int(time.time())}"
+        rows = [
+            User(email=f"{prefix}_{i}@example.com", username=f"{prefix}_{i}", hashed_password="x")
+            for i in range(users)
+        ]
+        db.add_all(rows)
+        db.flush()
+        user_ids = [user.id for user in rows]
+        post_rows = [
+            Post(content=random_text(rng, i), user_id=rng.choice(user_ids), is_moderated=True)
+            for i in range(posts)
+        ]
+        db.add_all(post_rows)
+        db.commit()
+        return {
+            "user_ids": user_ids,
+            "post_ids": [post.id for post in post_rows],
+            "post_authors": {post.id: post.user_id for post in post_rows},
+            "tokens": {user_id: create_access_token(user_id) for user_id in user_ids},
+        }
+    finally:
+        db.close()
+
+def decay_keeps_updated_at(post_id: int) -> bool:
+    """Give the post a hot score and an edit time, run two decay passes in-process and compare updated_at"""
+    from datetime import datetime, timedelta, timezone
+    from sqlalchemy import select, update
+    from app.core.config import settings
+    from app.db.session import SessionLocal
+    from app.models import Post
+    from app.services import trending
+
+    # A timestamp well in the past, so a pass that touched it couldn't land on the same value
+    edited_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    db = SessionLocal()
+    try:
+        db.execute(update(Post).where(Post.id == post_id).values(hot_score=1.0, updated_at=edited_at))
+        db.commit()
+        before = db.scalar(select(Post.updated_at).where(Post.id == post_id))
+    finally:
+        db.close()
+    # The first pass only records the time if this database never decayed
+    now = datetime.now(timezone.utc)
+    for passes in (1, 2):
+        trending.trending_decay.decay(now + timedelta(seconds=passes * settings.TRENDING_DECAY_INTERVAL))
+    db = SessionLocal()
+    try:
+        return db.scalar(select(Post.updated_at).where(Post.id == post_id)) == before
+    finally:
+        db.close()
+
+@asynccontextmanager
+async def api_server(port: int, env: Dict[str, str], startup_timeout: float):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, **env},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=base_url) as client:
+            deadline = time.monotonic() + startup_timeout
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError(f"API server exited with code {process.returncode}")
+                try:
+                    if (await client.get("/ready")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("API server did not become ready in time")
+                await asyncio.sleep(0.1)
+        yield base_url
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+class LoadRunner:
+    def __init__(self, base_url: str, data: Dict, concurrency: int, duration: float, seed_value: int):
+        self.base_url = base_url
+        self.data = data
+        self.concurrency = concurrency
+        self.duration = duration
+        self.rng = random.Random(seed_value)
+        self.serial = 0
+
+    def headers(self, user_id: int) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.data['tokens'][user_id]}"}
+
+    async def drive(self, request: Callable) -> Dict:
+        """Run ``request(client, worker)`` in a loop on every worker until the time is up"""
+        latencies: List[float] = []
+        errors = 0
+        limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=30) as client:
+            deadline = time.monotonic() + self.duration
+
+            async def worker(index: int):
+                nonlocal errors
+                while time.monotonic() < deadline:
+                    started = time.perf_counter()
+                    try:
+                        response = await request(client, index)
+                        ok = response.status_code < 400
+                    except httpx.HTTPError:
+                        ok = False
+                    if ok:
+                        latencies.append(time.perf_counter() - started)
+                    else:
+                        errors += 1
+
+            started = time.monotonic()
+            await asyncio.gather(*(worker(i) for i in range(self.concurrency)))
+            return summarize(latencies, errors, time.monotonic() - started)
+
+    def next_text(self) -> str:
+        self.serial += 1
+        return random_text(self.rng, self.serial)
+
+    async def feed_reads(self) -> Dict:
+        users = self.data["user_ids"]
+        return await self.drive(lambda client, i: client.get(
+            "/api/v1/posts/",
+            params={"skip": self.rng.choice((0, 0, 0, 10, 20)), "limit": 10},
+            headers=self.headers(users[i % len(users)])
+        ))
+
+    async def create_post(self) -> Dict:
+        users = self.data["user_ids"]
+        return await self.drive(lambda client, i: client.post(
+            "/api/v1/posts/",
+            json={"content": self.next_text()},
+            headers=self.headers(users[i % len(users)])
+        ))
+
+    async def create_comment(self) -> Dict:
+        users, posts = self.data["user_ids"], self.data["post_ids"]
+        return await self.drive(lambda client, i: client.post(
+            f"/api/v1/comments/{self.rng.choice(posts)}",
+            json={"content": self.next_text()},
+            headers=self.headers(users[i % len(users)])
+        ))
+
+    async def like_storm(self) -> Dict:
+        users = self.data["user_ids"]
+        hot_posts = self.data["post_ids"][:5]
+        return await self.drive(lambda client, i: client.post(
+            f"/api/v1/posts/{self.rng.choice(hot_posts)}/like",
+            headers=self.headers(self.rng.choice(users))
+        ))
+
+    async def check_versions(self) -> Dict[str, bool]:
+        post_id, user_id = self.data["post_ids"][-1], self.data["user_ids"][-1]
+        headers = self.headers(user_id)
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=30) as client:
+            before = await client.get(f"/api/v1/posts/{post_id}", headers=headers)
+            for _ in range(2):
+                (await client.post(f"/api/v1/posts/{post_id}/like", headers=headers)).raise_for_status()
+            after = await client.get(f"/api/v1/posts/{post_id}", headers=headers)
+        return {
+            "like_keeps_updated_at": before.json()["updated_at"] == after.json()["updated_at"],
+            "like_unlike_keeps_etag": before.headers["etag"] == after.headers["etag"],
+            "decay_keeps_updated_at": await asyncio.to_thread(decay_keeps_updated_at, post_id),
+        }
+
+    async def ws_fanout(self) -> Dict:
+        """
+        Half the users listen on /ws; the other half like the listeners'
+        posts. Only likes (not unlikes) push an activity message, so each
+        liker tracks what it has liked.
+        """
+        users = self.data["user_ids"]
+        listeners = set(users[: len(users) // 2])
+        likers = users[len(users) // 2:]
+        targets = [post_id for post_id, author in self.data["post_authors"].items() if author in listeners]
+        if not targets or not likers:
+            return summarize([], 0, 0)
+
+        sent: Dict[tuple, float] = {}
+        delivered: List[float] = []
+        ws_url = self.base_url.replace("http", "ws", 1)
+
+        async def listen(user_id: int, ready: asyncio.Event, connected: List[int]):
+            async with websockets.connect(f"{ws_url}/ws?token={self.data['tokens'][user_id]}") as ws:
+                connected.append(user_id)
+                if len(connected) == len(listeners):
+                    ready.set()
+                async for raw in ws:
+                    message = json.loads(raw)
+                    if message.get("type") != "activity":
+                        continue
+                    data = message["data"]
+                    started = sent.pop((data["targetId"], data["lastActorId"]), None)
+                    if started is not None:
+                        delivered.append(time.perf_counter() - started)
+
+        ready, connected = asyncio.Event(), []
+        listener_tasks = [asyncio.create_task(listen(user_id, ready, connected)) for user_id in listeners]
+        await asyncio.wait_for(ready.wait(), timeout=30)
+
+        liked = set()
+
+        async def like(client: httpx.AsyncClient, i: int):
+            user_id, post_id = self.rng.choice(likers), self.rng.choice(targets)
+            if (post_id, user_id) not in liked:
+                sent[(post_id, user_id)] = time.perf_counter()
+            liked.symmetric_difference_update({(post_id, user_id)})
+            return await client.post(f"/api/v1/posts/{post_id}/like", headers=self.headers(user_id))
+
+        result = await self.drive(like)
+        await asyncio.sleep(1)
+        for task in listener_tasks:
+            task.cancel()
+        await asyncio.gather(*listener_tasks, return_exceptions=True)
+
+        delivery = summarize(delivered, len(sent), self.duration)
+        result["delivered"] = len(delivered)
+        result["undelivered"] = len(sent)
+        result.update({f"delivery_{key}": delivery[key] for key in ("p50_ms", "p95_ms", "p99_ms")})
+        return result
+
+async def run(args) -> Dict:
+    moderation = FakeModerationServer(
+        latency_ms=args.moderation_latency_ms,
+        jitter_ms=args.moderation_jitter_ms,
+        error_rate=args.moderation_error_rate,
+        seed=args.seed
+    )
+    env = {
+        "DATABASE_URL": args.database_url,
+        "MODERATION_API_URL": moderation.start(),
+        "HUGGING_FACE_API_TOKEN": os.environ.get("HUGGING_FACE_API_TOKEN", "benchmark"),
+        # Scenarios deliberately exceed per-user limits
+        "RATE_LIMIT_ENABLED": os.environ.get("RATE_LIMIT_ENABLED", "false"),
+    }
+    os.environ.update(env)
+    try:
+        started = time.perf_counter()
+        async with api_server(free_port(), env, args.startup_timeout) as base_url:
+            startup = time.perf_counter() - started
+            data = await asyncio.to_thread(seed, args.users, args.posts, args.seed)
+            runner = LoadRunner(base_url, data, args.concurrency, args.duration, args.seed)
+            results = {}
+            for name in args.scenarios:
+                results[name] = await getattr(runner, name)()
+            checks = await runner.check_versions()
+    finally:
+        moderation.stop()
+
+    return {
+        "benchmark": "load",
+        "config": {
+            "database": args.database_url.split(":", 1)[0],
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "users": args.users,
+            "posts": args.posts,
+            "moderation_latency_ms": args.moderation_latency_ms,
+            "moderation_error_rate": args.moderation_error_rate,
+            "seed": args.seed,
+        },
+        "startup_s": round(startup, 3),
+        "moderation_requests": moderation.requests,
+        "scenarios": results,
+        "checks": checks,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="defaults to a fresh SQLite file")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--posts", type=int, default=1000)
+    parser.add_argument("--moderation-latency-ms", type=float, default=150)
+    parser.add_argument("--moderation-jitter-ms", type=float, default=50)
+    parser.add_argument("--moderation-error-rate", type=float, default=0.0)
+    parser.add_argument("--startup-timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--baseline", help="results file from an earlier run to compare against")
+    args = parser.parse_args()
+
+    if args.database_url is None:
+        args.database_url = f"sqlite:///{tempfile.mkdtemp()}/load.db"
+
+    result = asyncio.run(run(args))
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        result["change_pct"] = compare(result["scenarios"], baseline["scenarios"])
+    if args.output:
+        Path(args.output).write_text(json.dumps(result, indent=2))
+    print(json.dumps(result))
+    if not all(result["checks"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measure what the Prometheus instrumentation costs: requests/s of a small
+FastAPI app whose endpoint runs one query, without and with
+MetricsMiddleware and instrument_engine's statement hooks, plus the cost
+per SQL statement of the hooks alone.
+
+Both apps run in this process against their own SQLite database through
+httpx.ASGITransport, so the numbers isolate the instrumentation from
+network and server overhead. The variants are timed alternately --repeat times
+and the best run of each is kept.
+
+Usage: python -m benchmarks.metrics_overhead --requests 2000 --queries 20000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import MetricsMiddleware, instrument_engine
+
+def build_app(engine: Engine, instrumented: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    def read_item(item_id: int):
+        with engine.connect() as conn:
+            return {"id": item_id, "value": conn.execute(text("SELECT :id"), {"id": item_id}).scalar()}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+        instrument_engine(engine)
+    return app
+
+async def requests_per_second(app: FastAPI, requests: int) -> float:
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        # Warm the threadpool, the pool and the route
+        for i in range(50):
+            await client.get(f"/items/{i}")
+        started = time.perf_counter()
+        for i in range(requests):
+            (await client.get(f"/items/{i}")).raise_for_status()
+        return requests / (time.perf_counter() - started)
+
+def seconds_per_query(engine: Engine, queries: int) -> float:
+    with engine.connect() as conn:
+        statement = text("SELECT 1")
+        started = time.perf_counter()
+        for _ in range(queries):
+            conn.execute(statement).scalar()
+        return (time.perf_counter() - started) / queries
+
+def measure(directory: str, args) -> dict:
+    """Best of --repeat runs per variant, alternating so drift hits both alike"""
+    engines = {
+        variant: create_engine(f"sqlite:///{os.path.join(directory, f'{variant}.db')}")
+        for variant in ("plain", "instrumented")
+    }
+    apps = {variant: build_app(engine, variant == "instrumented") for variant, engine in engines.items()}
+    results = {variant: {"rps": 0.0, "query_us": float("inf")} for variant in engines}
+    for _ in range(args.repeat):
+        for variant, engine in engines.items():
+            result = results[variant]
+            result["rps"] = max(result["rps"], asyncio.run(requests_per_second(apps[variant], args.requests)))
+            result["query_us"] = min(result["query_us"], seconds_per_query(engine, args.queries) * 1e6)
+    for engine in engines.values():
+        engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        results = measure(directory, args)
+    plain, instrumented = results["plain"], results["instrumented"]
+
+    request_us = (1 / instrumented["rps"] - 1 / plain["rps"]) * 1e6
+    print(json.dumps({
+        "benchmark": "metrics_overhead",
+        "rps_plain": round(plain["rps"]),
+        "rps_instrumented": round(instrumented["rps"]),
+        "request_overhead_us": round(request_us, 1),
+        "request_overhead_pct": round((plain["rps"] / instrumented["rps"] - 1) * 100, 1),
+        "query_us_plain": round(plain["query_us"], 2),
+        "query_us_instrumented": round(instrumented["query_us"], 2),
+        "query_overhead_us": round(instrumented["query_us"] - plain["query_us"], 2),
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Check the number of SQL statements per feed page with count_queries():
+a page of 10 and a page of 100 posts, each by different authors with likes
+and comments, must cost the same number of queries (no N+1), and no more
+than --max-queries.
+
+Requests go through httpx.ASGITransport in this process, so the counter
+sees the endpoint's queries. A background thread keeps querying the same
+database the whole time, the way the outbox dispatcher and the other
+lifespan workers do; its statements must not show up in the counts. The
+command exits with status 1 if a page goes over budget or the counts differ.
+
+Usage: python -m benchmarks.query_counts --posts 300 --max-queries 3
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+from typing import Dict, List
+
+import httpx
+
+def seed(posts: int, seed_value: int = 42) -> Dict:
+    from app.core.security import create_access_token
+    from app.db.session import Base, SessionLocal, engine
+    from app.models import Comment, Like, Post, User
+
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed_value)
+    db = SessionLocal()
+    try:
+        users = [User(email=f"user{i}@example.com", username=f"user{i}", hashed_password="x") for i in range(posts)]
+        db.add_all(users)
+        db.flush()
+        # One author per post, so every page needs every author's summary
+        rows = [Post(content=f"post {i}", user_id=users[i].id, is_moderated=True) for i in range(posts)]
+        db.add_all(rows)
+        db.flush()
+        for post in rows:
+            for user in rng.sample(users, rng.randint(0, 5)):
+                db.add(Like(post_id=post.id, user_id=user.id))
+            for _ in range(rng.randint(0, 3)):
+                db.add(Comment(content="nice", post_id=post.id, user_id=rng.choice(users).id))
+        db.commit()
+        return {"token": create_access_token(users[0].id), "user_ids": [user.id for user in users]}
+    finally:
+        db.close()
+
+def background_queries(stop: threading.Event):
+    from sqlalchemy import text
+    from app.db.session import engine
+
+    while not stop.is_set():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT count(*) FROM posts")).scalar()
+
+async def page_queries(client: httpx.AsyncClient, token: str, user_ids: List[int], limit: int) -> int:
+    from app.db.query_log import count_queries
+    from app.services.author_loader import author_cache
+
+    # Start from a cold author cache, as a fresh process would
+    for user_id in user_ids:
+        author_cache.invalidate(user_id)
+    with count_queries() as counter:
+        response = await client.get(
+            "/api/v1/posts/", params={"limit": limit}, headers={"Authorization": f"Bearer {token}"}
+        )
+    response.raise_for_status()
+    assert len(response.json()) == limit
+    return counter.count
+
+async def run(args) -> Dict:
+    data = seed(args.posts)
+    from app.main import app
+
+    stop = threading.Event()
+    noise = threading.Thread(target=background_queries, args=(stop,), daemon=True)
+    noise.start()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            counts = {
+                limit: await page_queries(client, data["token"], data["user_ids"], limit)
+                for limit in (10, 100)
+            }
+    finally:
+        stop.set()
+        noise.join()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=300)
+    parser.add_argument("--max-queries", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Before anything imports app.db.session
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        counts = asyncio.run(run(args))
+
+    ok = len(set(counts.values())) == 1 and max(counts.values()) <= args.max_queries
+    print(json.dumps({
+        "benchmark": "query_counts",
+        "queries_per_page": {str(limit): count for limit, count in counts.items()},
+        "max_queries": args.max_queries,
+        "ok": ok,
+    }))
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
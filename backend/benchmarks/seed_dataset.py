@@ -0,0 +1,484 @@
+"""
+Generate a production-sized synthetic dataset: users, posts, threaded
+comments, post and comment likes, activity notifications and admin
+moderation notifications.
+
+Popularity follows power laws: a few users write most of the posts, and
+likes and comments concentrate on a few posts. Rows are generated with
+numpy in fixed-size chunks, each from its own seeded random stream, so
+the same --seed produces the same data whatever the number of workers.
+Chunks are bulk-loaded with COPY on PostgreSQL and batched executemany
+elsewhere; on PostgreSQL, chunks load in parallel worker processes.
+
+Verdict columns follow from the generated classifier scores under the
+current moderation policy, and flagged content gets an admin notification.
+
+Every user's password is "password". The target database must be empty.
+
+Usage: python -m benchmarks.seed_dataset --database-url postgresql://... --users 1000000 --posts 5000000 --workers 8
+       python -m benchmarks.seed_dataset --database-url sqlite:///seed.db --users 10000 --posts 50000 --snapshot seed.sqlite
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+CHUNK_SIZE = 50_000
+SECONDS_PER_DAY = 86_400
+
+# Separate random streams, so generating one table never shifts another
+STREAMS = {
+    "users": 1, "authors": 2, "posts": 3, "post_stats": 4, "post_text": 5,
+    "comments": 6, "comment_text": 7, "likes": 8, "comment_likes": 9, "activity": 10,
+}
+MODERATION_COLUMNS = (
+    "is_moderated", "is_negative", "moderation_severity", "moderation_reason", "is_hidden",
+    "hate_score", "offensive_score", "moderation_policy_version"
+)
+POST_COLUMNS = ("id", "content", "user_id", *MODERATION_COLUMNS, "hot_score", "created_at")
+COMMENT_COLUMNS = ("id", "content", "user_id", "post_id", "parent_id", *MODERATION_COLUMNS, "created_at")
+WORDS = np.array((
+    "the a to and of in is it you that was for on are with as have be at this "
+    "coffee morning music weekend project release python travel pizza running "
+    "sunset library garden concert movie book game team city night friends "
+    "love great today really think new good best time people know update"
+).split())
+
+@dataclass(frozen=True)
+class Config:
+    database_url: str
+    users: int
+    posts: int
+    comments_per_post: float
+    likes_per_post: float
+    likes_per_comment: float
+    reply_ratio: float
+    days: int
+    seed: int
+    end: float
+
+def stream(config: Config, name: str, chunk: int) -> np.random.Generator:
+    return np.random.default_rng([config.seed, STREAMS[name], chunk])
+
+def chunks(total: int) -> List[Tuple[int, int, int]]:
+    """(chunk index, first id, last id + 1) over 1..total"""
+    return [
+        (index, start, min(start + CHUNK_SIZE, total + 1))
+        for index, start in enumerate(range(1, total + 1, CHUNK_SIZE))
+    ]
+
+def timestamps(seconds: np.ndarray) -> List[datetime]:
+    return [datetime.fromtimestamp(value, tz=timezone.utc) for value in seconds.tolist()]
+
+def texts(rng: np.random.Generator, count: int, min_words: int, max_words: int) -> List[str]:
+    lengths = rng.integers(min_words, max_words + 1, size=count)
+    words = WORDS[rng.integers(0, len(WORDS), size=int(lengths.sum()))].tolist()
+    out, position = [], 0
+    for length in lengths.tolist():
+        out.append(" ".join(words[position:position + length]))
+        position += length
+    return out
+
+def scores(rng: np.random.Generator, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Classifier scores: mostly clean content plus a few percent of toxic content"""
+    toxic = rng.random(count) < 0.03
+    hate = np.where(toxic, rng.uniform(0.2, 1, size=count), rng.beta(0.4, 25, size=count))
+    offensive = np.where(toxic, rng.uniform(0.3, 1, size=count), rng.beta(0.6, 12, size=count))
+    return hate.round(4), offensive.round(4)
+
+def verdicts(policy, hate: np.ndarray, offensive: np.ndarray) -> List[tuple]:
+    """ModerationPolicy.classify over whole arrays: (is_negative, severity, reason, is_hidden)"""
+    from app.services.moderation_policy import HIDDEN_SEVERITIES, REASONS
+    from app.models.notification import SeverityLevel
+
+    levels = (SeverityLevel.high, SeverityLevel.medium, SeverityLevel.low)
+    choice = np.select(
+        [
+            hate > policy.hate_high,
+            (hate > policy.hate_medium) | (offensive > policy.offensive_medium),
+            offensive > policy.offensive_low
+        ],
+        [0, 1, 2],
+        default=-1
+    )
+    outcomes = [(True, level.name, REASONS[level], level in HIDDEN_SEVERITIES) for level in levels]
+    clean = (False, None, None, False)
+    return [outcomes[index] if index >= 0 else clean for index in choice.tolist()]
+
+def power_law(rng: np.random.Generator, count: int, exponent: float = 1.6) -> np.ndarray:
+    """Pareto weights normalised to mean 1"""
+    weights = rng.pareto(exponent, size=count) + 1
+    return weights / weights.mean()
+
+def author_cdf(config: Config) -> np.ndarray:
+    """Zipf-like activity over users in a fixed shuffled order, as a CDF over user ids"""
+    rng = stream(config, "authors", 0)
+    weights = 1 / np.arange(1, config.users + 1) ** 0.9
+    weights = weights[rng.permutation(config.users)]
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def pick_users(rng: np.random.Generator, cdf: np.ndarray, count: int) -> np.ndarray:
+    return np.searchsorted(cdf, rng.random(count), side="right") + 1
+
+def post_times(config: Config, ids: np.ndarray) -> np.ndarray:
+    """Posts are spread evenly over the time span, in id order"""
+    span = config.days * SECONDS_PER_DAY
+    return config.end - span + (ids - 1) / max(config.posts, 1) * span
+
+def post_stats(config: Config, chunk: int, count: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Comment and like counts per post in a chunk"""
+    rng = stream(config, "post_stats", chunk)
+    popularity = power_law(rng, count)
+    comments = rng.poisson(config.comments_per_post * popularity)
+    likes = np.minimum(rng.poisson(config.likes_per_post * popularity), config.users)
+    return comments, likes
+
+def count_comments(config: Config, chunk: Tuple[int, int, int]) -> int:
+    index, start, stop = chunk
+    return int(post_stats(config, index, stop - start)[0].sum())
+
+def post_authors(config: Config, chunk: int, count: int, cdf: np.ndarray) -> np.ndarray:
+    return pick_users(stream(config, "posts", chunk), cdf, count)
+
+def thread_offsets(counts: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Subtract from each value the running total reached before its group started"""
+    starts = np.cumsum(counts) - counts
+    return values - np.repeat(np.r_[0, values][starts], counts)
+
+def like_rows(config: Config, rng: np.random.Generator, cdf: np.ndarray, counts: np.ndarray,
+              target_ids: np.ndarray, target_times: np.ndarray, kind: str):
+    """Likes for the given targets, at most one per user and target"""
+    targets = np.repeat(target_ids, counts)
+    users = pick_users(rng, cdf, len(targets))
+    # Most likes arrive within hours of posting
+    times = np.minimum(np.repeat(target_times, counts) + rng.exponential(6 * 3600, len(targets)), config.end)
+    _, keep = np.unique(targets.astype(np.int64) * (config.users + 1) + users, return_index=True)
+    targets, users, times = targets[keep], users[keep], times[keep]
+    empty = [None] * len(targets)
+    rows = list(zip(
+        users.tolist(),
+        targets.tolist() if kind == "post" else empty,
+        targets.tolist() if kind == "comment" else empty,
+        timestamps(times)
+    ))
+    return targets, users, times, rows
+
+def activity_rows(rng: np.random.Generator, window: int, action: str, kind: str, targets: np.ndarray,
+                  recipients: np.ndarray, actors: np.ndarray, times: np.ndarray) -> List[tuple]:
+    """One aggregated notification per target: last actor, actor count, last time"""
+    if not len(targets):
+        return []
+    order = np.lexsort((times, targets))
+    targets, recipients, actors, times = targets[order], recipients[order], actors[order], times[order]
+    last = np.r_[targets[1:] != targets[:-1], True]
+    counts = np.diff(np.r_[0, np.flatnonzero(last) + 1])
+    targets, recipients, actors, times = targets[last], recipients[last], actors[last], times[last]
+    own = recipients == actors
+    targets, actors, times, counts, recipients = (
+        values[~own] for values in (targets, actors, times, counts, recipients)
+    )
+    read = rng.random(len(targets)) < 0.7
+    updated = timestamps(times)
+    buckets = timestamps(times // window * window)
+    return [
+        (recipient, action, kind, target, bucket, count, actor, f"user{actor}", at, at, is_read)
+        for recipient, target, bucket, count, actor, at, is_read in zip(
+            recipients.tolist(), targets.tolist(), buckets, counts.tolist(),
+            actors.tolist(), updated, read.tolist()
+        )
+    ]
+
+def write(conn, table: str, columns: Sequence[str], rows: List[tuple]):
+    if not rows:
+        return
+    if conn.dialect.name == "postgresql":
+        # COPY in CSV form; an unquoted empty field is NULL
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(
+            ["" if value is None else value for value in row] for row in rows
+        )
+        buffer.seek(0)
+        cursor = conn.connection.dbapi_connection.cursor()
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        return
+    from app.db.session import Base
+    # Core executemany, so column types store dates and enums the way the app reads them
+    conn.execute(Base.metadata.tables[table].insert(), [dict(zip(columns, row)) for row in rows])
+
+_engine = None
+
+def _connect(config: Config):
+    global _engine
+    if _engine is None:
+        from sqlalchemy import create_engine
+        _engine = create_engine(config.database_url)
+    return _engine.begin()
+
+def load_users(config: Config, chunk: Tuple[int, int, int], password_hash: str) -> int:
+    index, start, stop = chunk
+    rng = stream(config, "users", index)
+    ids = np.arange(start, stop)
+    # Accounts are created over the first half of the time span
+    span = config.days * SECONDS_PER_DAY
+    created = timestamps(config.end - span + (ids - 1) / max(config.users, 1) * span / 2)
+    bios = np.where(rng.random(len(ids)) < 0.4, texts(rng, len(ids), 3, 12), None).tolist()
+    rows = [
+        (user_id, f"user{user_id}@example.com", f"user{user_id}", password_hash, f"User {user_id}",
+         bio, True, user_id == 1, at)
+        for user_id, bio, at in zip(ids.tolist(), bios, created)
+    ]
+    with _connect(config) as conn:
+        write(conn, "users", (
+            "id", "email", "username", "hashed_password", "full_name", "bio",
+            "is_active", "is_superuser", "created_at"
+        ), rows)
+    return len(rows)
+
+def load_posts(config: Config, chunk: Tuple[int, int, int], policy) -> int:
+    index, start, stop = chunk
+    ids = np.arange(start, stop)
+    authors = post_authors(config, index, len(ids), author_cdf(config))
+    rng = stream(config, "post_text", index)
+    content = texts(rng, len(ids), 5, 45)
+    hate, offensive = scores(rng, len(ids))
+    rows = [
+        (post_id, text, author, True, *verdict, hate_score, offensive_score, policy.version, 0.0, at)
+        for post_id, text, author, verdict, hate_score, offensive_score, at in zip(
+            ids.tolist(), content, authors.tolist(), verdicts(policy, hate, offensive),
+            hate.tolist(), offensive.tolist(), timestamps(post_times(config, ids))
+        )
+    ]
+    with _connect(config) as conn:
+        write(conn, "posts", POST_COLUMNS, rows)
+    return len(rows)
+
+def load_engagement(config: Config, chunk: Tuple[int, int, int], first_comment_id: int,
+                    policy, window: int) -> Dict[str, int]:
+    """Comments, likes and activity notifications for one chunk of posts"""
+    index, start, stop = chunk
+    cdf = author_cdf(config)
+    post_ids = np.arange(start, stop)
+    times = post_times(config, post_ids)
+    authors = post_authors(config, index, len(post_ids), cdf)
+    comment_counts, like_counts = post_stats(config, index, len(post_ids))
+
+    # Comments arrive over the hours after a post; later comments in a
+    # thread may reply to an earlier one
+    rng = stream(config, "comments", index)
+    total = int(comment_counts.sum())
+    comment_ids = np.arange(first_comment_id, first_comment_id + total)
+    comment_posts = np.repeat(post_ids, comment_counts)
+    position = thread_offsets(comment_counts, np.arange(1, total + 1)) - 1
+    is_reply = (position > 0) & (rng.random(total) < config.reply_ratio)
+    parent_offsets = np.floor(rng.random(total) * position).astype(np.int64)
+    parents = np.where(is_reply, comment_ids - position + parent_offsets, 0)
+    comment_authors = pick_users(rng, cdf, total)
+    delays = thread_offsets(comment_counts, np.cumsum(rng.exponential(2 * 3600, total)))
+    comment_times = np.minimum(np.repeat(times, comment_counts) + delays, config.end)
+    text_rng = stream(config, "comment_text", index)
+    content = texts(text_rng, total, 2, 25)
+    hate, offensive = scores(text_rng, total)
+    comments = [
+        (comment_id, text, author, post_id, parent or None, True, *verdict,
+         hate_score, offensive_score, policy.version, at)
+        for comment_id, text, author, post_id, parent, verdict, hate_score, offensive_score, at in zip(
+            comment_ids.tolist(), content, comment_authors.tolist(), comment_posts.tolist(),
+            parents.tolist(), verdicts(policy, hate, offensive), hate.tolist(), offensive.tolist(),
+            timestamps(comment_times)
+        )
+    ]
+
+    liked_posts, likers, like_times, post_likes = like_rows(
+        config, stream(config, "likes", index), cdf, like_counts, post_ids, times, "post"
+    )
+    comment_rng = stream(config, "comment_likes", index)
+    comment_like_counts = np.minimum(
+        comment_rng.poisson(config.likes_per_comment * power_law(comment_rng, total)), config.users
+    ) if total else np.zeros(0, dtype=np.int64)
+    _, _, _, comment_likes = like_rows(
+        config, comment_rng, cdf, comment_like_counts, comment_ids, comment_times, "comment"
+    )
+
+    # Replies notify the author of the post or of the comment replied to
+    activity_rng = stream(config, "activity", index)
+    top_level = parents == 0
+    activity = (
+        activity_rows(
+            activity_rng, window, "like", "post", liked_posts, authors[liked_posts - start], likers, like_times
+        )
+        + activity_rows(
+            activity_rng, window, "reply", "post", comment_posts[top_level],
+            authors[comment_posts[top_level] - start], comment_authors[top_level], comment_times[top_level]
+        )
+        + activity_rows(
+            activity_rng, window, "reply", "comment", parents[~top_level],
+            comment_authors[parents[~top_level] - first_comment_id], comment_authors[~top_level],
+            comment_times[~top_level]
+        )
+    )
+
+    with _connect(config) as conn:
+        write(conn, "comments", COMMENT_COLUMNS, comments)
+        write(conn, "likes", ("user_id", "post_id", "comment_id", "created_at"), post_likes + comment_likes)
+        write(conn, "activity_notifications", (
+            "recipient_id", "action", "target_type", "target_id", "bucket_start", "actor_count",
+            "last_actor_id", "last_actor_name", "created_at", "updated_at", "is_read"
+        ), activity)
+    return {
+        "comments": len(comments),
+        "likes": len(post_likes) + len(comment_likes),
+        "activity_notifications": len(activity),
+    }
+
+def finish(config: Config) -> Dict[str, int]:
+    """File admin notifications for flagged content, fix sequences and refresh statistics"""
+    from datetime import date
+    from sqlalchemy import text
+    from app.db.session import engine
+    from app.services.notification_partitions import notification_partitions
+
+    postgres = engine.dialect.name == "postgresql"
+    with engine.begin() as conn:
+        if postgres and notification_partitions._is_partitioned(conn):
+            # Older rows land in the default partition
+            notification_partitions.ensure_partitions(conn, date.today())
+        flagged = 0
+        for table, kind in (("posts", "post"), ("comments", "comment")):
+            flagged += conn.execute(text(
+                f"INSERT INTO notifications (type, severity, content, content_id, content_type, created_at, is_read) "
+                f"SELECT 'moderation', moderation_severity, moderation_reason, id, '{kind}', created_at, "
+                f"created_at < :read_before FROM {table} WHERE is_negative"
+            ), {"read_before": datetime.fromtimestamp(config.end - 7 * SECONDS_PER_DAY, tz=timezone.utc)}).rowcount
+        if postgres:
+            for table in ("users", "posts", "comments"):
+                conn.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), COALESCE(MAX(id), 1)) FROM {table}"
+                ))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+    return {"notifications": flagged}
+
+def snapshot(database_url: str, path: str):
+    """pg_dump custom-format archive, or a consistent copy of the SQLite file"""
+    if database_url.startswith("postgresql"):
+        subprocess.run(
+            ["pg_dump", "--format=custom", "--no-owner", f"--file={path}", database_url.replace("+psycopg2", "")],
+            check=True
+        )
+        return
+    import sqlite3
+    source = sqlite3.connect(database_url.split("///", 1)[1])
+    target = sqlite3.connect(path)
+    with target:
+        source.backup(target)
+    source.close()
+    target.close()
+
+def run(config: Config, workers: int, snapshot_path: Optional[str]) -> Dict:
+    from sqlalchemy import func, select
+    from app.core.config import settings
+    from app.core.security import get_password_hash
+    from app.services.moderation_policy import current_policy
+    from app.db.session import Base, SessionLocal, engine
+    from app.models import User
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if db.scalar(select(func.count(User.id))):
+            raise SystemExit("The target database already has users; seed an empty database")
+    finally:
+        db.close()
+
+    if engine.dialect.name != "postgresql":
+        workers = 1  # SQLite allows one writer at a time
+    started = time.perf_counter()
+    timings, counts = {}, {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def parallel(name: Optional[str], fn, tasks: List, *args) -> List:
+            """Run ``fn(config, task, *args)`` for every task; list args are per task"""
+            phase_started = time.perf_counter()
+            columns = [arg if isinstance(arg, list) else [arg] * len(tasks) for arg in args]
+            results = list(pool.map(fn, [config] * len(tasks), tasks, *columns))
+            if name is not None:
+                timings[name] = round(time.perf_counter() - phase_started, 2)
+            return results
+
+        # Phases run in foreign key order
+        counts["users"] = sum(parallel("users", load_users, chunks(config.users), get_password_hash("password")))
+        counts["posts"] = sum(parallel("posts", load_posts, chunks(config.posts), current_policy()))
+
+        # Comment ids are assigned per chunk from the counts each chunk will generate
+        post_chunks = chunks(config.posts)
+        per_chunk = parallel(None, count_comments, post_chunks)
+        first_ids = (np.cumsum([0] + per_chunk[:-1]) + 1).tolist()
+        for result in parallel(
+            "engagement", load_engagement, post_chunks, first_ids,
+            current_policy(), settings.ACTIVITY_NOTIFICATION_WINDOW
+        ):
+            for key, value in result.items():
+                counts[key] = counts.get(key, 0) + value
+
+    finish_started = time.perf_counter()
+    counts.update(finish(config))
+    timings["finish"] = round(time.perf_counter() - finish_started, 2)
+
+    if snapshot_path:
+        snapshot_started = time.perf_counter()
+        snapshot(config.database_url, snapshot_path)
+        timings["snapshot"] = round(time.perf_counter() - snapshot_started, 2)
+
+    return {
+        "benchmark": "seed_dataset",
+        "config": {key: value for key, value in asdict(config).items() if key != "database_url"},
+        "workers": workers,
+        "rows": counts,
+        "seconds": timings,
+        "total_seconds": round(time.perf_counter() - started, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--posts", type=int, default=1_000_000)
+    parser.add_argument("--comments-per-post", type=float, default=3.0)
+    parser.add_argument("--likes-per-post", type=float, default=8.0)
+    parser.add_argument("--likes-per-comment", type=float, default=1.0)
+    parser.add_argument("--reply-ratio", type=float, default=0.4, help="share of comments that reply to a comment")
+    parser.add_argument("--days", type=int, default=365, help="history length, ending at --end")
+    parser.add_argument("--end", default="2025-01-01", help="date of the newest content, fixed for reproducibility")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--snapshot", help="write a pg_dump archive or SQLite copy here when done")
+    args = parser.parse_args()
+
+    # Before any app import, so the app's engine points at the target
+    os.environ["DATABASE_URL"] = args.database_url
+    config = Config(
+        database_url=args.database_url,
+        users=args.users,
+        posts=args.posts,
+        comments_per_post=args.comments_per_post,
+        likes_per_post=args.likes_per_post,
+        likes_per_comment=args.likes_per_comment,
+        reply_ratio=args.reply_ratio,
+        days=args.days,
+        seed=args.seed,
+        end=datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc).timestamp(),
+    )
+    print(json.dumps(run(config, args.workers, args.snapshot)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare per-item cost of the feed list endpoint before and after the
+projection path: ORM hydration + Pydantic from_attributes + lazy counts
+versus a column projection rendered with orjson.
+
+Usage: python -m benchmarks.serialization --posts 2000 --page 100
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api.serializers import list_response
+from app.api.v1.endpoints.posts import POST_COLUMNS
+from app.db.session import Base
+from app.models import Comment, Like, Post, User
+from app.schemas.post import PostResponse
+
+def seed(session, posts: int, seed_value: int = 42):
+    rng = random.Random(seed_value)
+    users = [User(email=f"user{i}@example.com", username=f"user{i}", hashed_password="x") for i in range(50)]
+    session.add_all(users)
+    session.flush()
+    rows = [Post(content=f"post {i} " * 8, user_id=rng.choice(users).id) for i in range(posts)]
+    session.add_all(rows)
+    session.flush()
+    for post in rows:
+        for user in rng.sample(users, rng.randint(0, 10)):
+            session.add(Like(post_id=post.id, user_id=user.id))
+        for _ in range(rng.randint(0, 3)):
+            session.add(Comment(content="nice", post_id=post.id, user_id=rng.choice(users).id))
+    session.commit()
+
+def orm_page(session, page: int) -> bytes:
+    """The previous path: full entities, validated and encoded by FastAPI"""
+    adapter = TypeAdapter(List[PostResponse])
+    posts = session.query(Post).order_by(Post.created_at.desc()).limit(page).all()
+    items = adapter.validate_python(posts, from_attributes=True)
+    return json.dumps(adapter.dump_python(items, mode="json")).encode()
+
+def projection_page(session, page: int) -> bytes:
+    rows = session.execute(select(*POST_COLUMNS).order_by(Post.created_at.desc()).limit(page))
+    return list_response(PostResponse, rows).body
+
+def timed(fn, session, page: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        session.expunge_all()
+        start = time.perf_counter()
+        fn(session, page)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--posts", type=int, default=2000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        seed(session, args.posts)
+
+        before = timed(orm_page, session, args.page, args.repeat)
+        after = timed(projection_page, session, args.page, args.repeat)
+        session.close()
+        engine.dispose()
+
+    print(json.dumps({
+        "benchmark": "serialization",
+        "page_size": args.page,
+        "orm_us_per_item": round(before / args.page * 1e6, 1),
+        "projection_us_per_item": round(after / args.page * 1e6, 1),
+        "speedup": round(before / after, 1),
+    }))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measure the memory held by ConnectionManager per WebSocket connection.
+
+Usage: python -m benchmarks.ws_memory --connections 10000 --users 2000
+"""
+import argparse
+import asyncio
+import json
+import tracemalloc
+
+from app.websocket import ConnectionManager
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket"""
+    __slots__ = ()
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, data: str):
+        pass
+
+    async def close(self, code: int = 1000):
+        pass
+
+async def measure(connections: int, users: int) -> dict:
+    manager = ConnectionManager()
+    sockets = [FakeWebSocket() for _ in range(connections)]
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    for i, websocket in enumerate(sockets):
+        await manager.connect(websocket, i % users)
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    if manager._heartbeat_task is not None:
+        manager._heartbeat_task.cancel()
+
+    return {
+        "benchmark": "ws_memory",
+        "connections": manager.connection_count,
+        "online_users": len(manager.online_users()),
+        "bytes_total": after - before,
+        "bytes_per_connection": round((after - before) / max(manager.connection_count, 1), 1),
+        "bytes_peak": peak - before,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=2000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(measure(args.connections, args.users))))
+
+if __name__ == "__main__":
+    main()
@@ -30,6 +30,13 @@ export const useWebSocket = create<WebSocketStore>((set, get) => ({
             console.log('WebSocket connected');
         };
 
+        // Answer server heartbeats so the connection is not reaped as idle
+        socket.addEventListener('message', (event: MessageEvent) => {
+            if (event.data === '{"type":"ping"}') {
+                socket.send('pong');
+            }
+        });
+
         socket.onclose = () => {
             set({ socket: null, isConnected: false });
             console.log('WebSocket disconnected');